@@ -1,12 +1,25 @@
+import time
+
+# Taken before the other imports so that the startup report includes the time spent importing them
+_import_start = time.perf_counter()
+
 import pygame
 import math
+import os
 
 import rocket
 import image_loader
 import moon
 import flight_display as fd
 import datalogger
+import font_cache
 import pygraph
+import text_cache
+import frame_profiler
+import resolution_scaling
+import timestep
+
+IMPORT_TIME = time.perf_counter() - _import_start
 
 """
 TO DO:
@@ -14,194 +27,478 @@ TO DO:
 
 
 class MoonLander:
-    def __init__(self):
+    # Phases of a frame timed by the frame profiler
+    FRAME_PHASES = ("events", "input", "rocket", "moon", "log", "indicators", "moon draw", "sprites", "hud", "flip",
+                    "wait")
+    # Phases of starting the game, up to the first frame on screen
+    STARTUP_PHASES = ("pygame init", "display", "fonts", "sprites", "game objects", "first frame")
+
+    def __init__(self, recording_dir="recordings", replay_path=None, replay_speed=1.0,
+                 profile_path=os.path.join("recordings", "frame_profile.csv"), physics_rate=240, max_fps=60,
+                 max_substeps: int = 16, resolution=(1280, 720), scale_to_window=True, render_scale=1.0,
+                 dynamic_resolution=True, min_render_scale=0.5):
+        """
+        :param recording_dir: directory every flight is recorded to, or None to not record flights
+        :param replay_path: optional flight recording to replay instead of showing the title screen
+        :param replay_speed: playback rate of the replay (2 is twice real time)
+        :param profile_path: file the frame profile is written to when the game is closed, or None to not write it
+        :param physics_rate: physics steps per second, independent of the display rate
+        :param max_fps: most frames drawn per second during a flight
+        :param max_substeps: most physics steps run in one frame, after which the game slows down instead
+        :param resolution: (width, height) of the display, fitted to 16:9
+        :param scale_to_window: whether SDL scales the display to fit the window, on the GPU where there is one, so the
+                                window can be resized or made fullscreen at any size. Without a GPU this costs a copy of
+                                every frame, so set the resolution to the screen's own and turn this off instead
+        :param render_scale: fraction of the display's resolution that frames are drawn at, then scaled up to it
+        :param dynamic_resolution: whether to lower the render scale when frames run over their time budget during a
+                                   flight, and raise it again when there is time to spare
+        :param min_render_scale: lowest render scale used by dynamic resolution
+        """
+        # Time each phase of starting the game, reported once the first frame is shown
+        self.startup_profiler = frame_profiler.FrameProfiler(self.STARTUP_PHASES, capacity=1)
+        self.startup_profiler.start_frame()
+        self.startup_time = None
+
         pygame.init()
+        self.startup_profiler.mark("pygame init")
+        # Everything is laid out in a 1280x720 space, which is scaled to the resolution frames are drawn at
         self.window_width = 1280
         self.window_height = 720
 
-        self.screen = pygame.display.set_mode((self.window_width, self.window_height))
+        # Frames drawn at a lower resolution than the display are scaled up to it
+        display_scale = min(resolution[0] / self.window_width, resolution[1] / self.window_height)
+        self.display = pygame.display.set_mode((round(self.window_width * display_scale),
+                                                round(self.window_height * display_scale)),
+                                               pygame.SCALED | pygame.RESIZABLE if scale_to_window else 0)
         pygame.display.set_caption("Moon Lander")
         self.clock = pygame.time.Clock()
-        self.font = pygame.font.SysFont("Helvetica", 30)
-        self.title_font = pygame.font.SysFont("Helvetica", 100)
+        self.startup_profiler.mark("display")
+        self.screen = None
+        self.text = text_cache.TextCache()
+        self.set_render_scale(render_scale)
+        self.startup_profiler.mark("fonts")
+
+        self.max_fps = max_fps
+        self.resolution_controller = None
+        if dynamic_resolution:
+            # Frames are given most of the time between them, leaving the rest for the display and the system
+            budget = 0.9 * 1000 / max_fps
+            min_render_scale = min(min_render_scale, render_scale)
+            self.resolution_controller = resolution_scaling.DynamicResolution(budget, min_render_scale, render_scale)
+
+        # Time each phase of every frame, shown with F3
+        self.profiler = frame_profiler.FrameProfiler(self.FRAME_PHASES)
+        self.profiler_overlay = frame_profiler.ProfilerOverlay(self, self.profiler)
+        self.profile_path = profile_path
 
         image_index = {"lander": ((0, 1), (15, 15)),
                        "lander_flames": ((15, 1), (30, 15)),
                        "explosion": ((30, 0), (45, 15))}
         self.sprite_images = image_loader.get_textures("assets/sprites.png", image_index)
+        self.startup_profiler.mark("sprites")
+        self.rotation_cache = image_loader.RotationCache()
         self.data_storage = datalogger.DataLogger()
+        self.recording_dir = recording_dir
+        self.recorder = None
+
+        self.g = 1.5
+        replay_metadata = None
+        if replay_path is not None:
+            import flight_recorder
+            replay_metadata, _ = flight_recorder.read_recording(replay_path)
+            self.g = replay_metadata["g"]
 
         self.rocket = rocket.Rocket(self)
-        self.moon = moon.Moon(self)
+        self.moon = moon.Moon(self, seed=None if replay_metadata is None else replay_metadata["seed"])
 
         self.throttle_indicator = fd.ScaleDisplay(self, (50, 485), (50, 235), (0, 50))
         self.height_indicator = fd.ScaleDisplay(self, (1230, 485), (1230, 235), (0, 10000))
+        self.telemetry_chart = fd.StripChart(self, (880, 15), (320, 100), ((0, 10000), (0, 100), (0, 50)),
+                                             pygraph.COLOURS)
 
-        self.g = 1.5
+        # The physics runs in fixed steps, with the flight drawn between the last two physics states
+        self.timestep = timestep.FixedTimestep(physics_rate, max_substeps)
         self.time = 0
-        self.dt = 0.01
-        self.scale = (1, 1)
-
-        self.loading_screen()
+        self.dt = self.timestep.step_time / 100
+
+        # Generate the terrain around the starting point in the background while the title screen is shown
+        self.load_start = pygame.time.get_ticks()
+        self.load_time = None
+        self.moon.load()
+        self.startup_profiler.mark("game objects")
+        if replay_path is None:
+            self.title_screen()
+        else:
+            self.loading_screen()
+            self.replay(replay_path, replay_speed)
 
     def loading_screen(self):
         """
-        Method to load in the moon and display the loading screen
+        Method to display the loading screen until the terrain around the starting point has been loaded
         """
-        load_time = 0
-        load_rect = pygame.Rect(540, 360, 200, 200)
-        end_angle = math.pi/2
-        num_points = 100000
-        num_per_loop = 100
-        num_loops = num_points//num_per_loop
+        load_rect = pygame.Rect(self.to_screen((540, 360)), self.to_screen((200, 200)))
 
-        for i in range(num_loops):
-            # Generate the moon height map for a small number of points
-            self.moon.load(num_per_loop, i*num_per_loop)
+        title_text_img = self.title_font.render("MOON LANDER", True, (255, 255, 255))
+        loading_text_img = self.font.render("LOADING", True, (255, 255, 255))
 
+        while not self.check_loaded():
             # Clear the event queue
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    raise SystemExit
+                    self.quit()
 
             self.screen.fill("black")
 
             # Add text for the game title and loading
-            title_text_img = self.title_font.render("MOON LANDER", True, (255, 255, 255))
-            self.screen.blit(title_text_img, ((self.window_width/2)-(title_text_img.get_width()/2), 100))
-
-            loading_text_img = self.font.render("LOADING", True, (255, 255, 255))
-            self.screen.blit(loading_text_img, ((self.window_width/2) - (loading_text_img.get_width()/2),
-                                                460-(loading_text_img.get_height()/2)))
+            self.blit_centred(title_text_img, 100)
+            self.blit_centred(loading_text_img, 460 - loading_text_img.get_height() / (2 * self.scale[1]))
 
             # Draw the loading indicator
-            end_angle += math.pi/(num_loops/2)
-            pygame.draw.arc(self.screen, (255, 255, 255), load_rect, math.pi/2, end_angle, 20)
+            end_angle = math.pi/2 + 2*math.pi*self.moon.load_progress()
+            pygame.draw.arc(self.screen, (255, 255, 255), load_rect, math.pi/2, end_angle, self.scaled(20))
 
-            pygame.display.flip()
-            load_time += self.clock.tick()
+            self.present()
+            self.report_startup()
+            self.clock.tick(60)
 
-        print("Loading Time: {} ms".format(load_time))
-        self.title_screen()
+    def check_loaded(self):
+        """
+        Method to check whether the terrain needed to start a flight is ready, reporting how long it took to load the
+        first time it is
+        """
+        if self.load_time is None and self.moon.ready():
+            self.load_time = pygame.time.get_ticks() - self.load_start
+            print("Loading Time: {} ms".format(self.load_time))
+        return self.load_time is not None
+
+    def report_startup(self):
+        """
+        Method to report how long the game took to start, and where the time went, the first time a frame is shown
+        """
+        if self.startup_time is not None:
+            return
+        self.startup_profiler.mark("first frame")
+        self.startup_profiler.end_frame()
+        phase_times = self.startup_profiler.frames()[-1] * 1000
+        self.startup_time = IMPORT_TIME * 1000 + phase_times.sum()
+
+        breakdown = ["imports {:.1f}".format(IMPORT_TIME * 1000)]
+        breakdown += ["{} {:.1f}".format(phase, t) for phase, t in zip(self.STARTUP_PHASES, phase_times)]
+        print("Startup Time: {:.1f} ms ({})".format(self.startup_time, ", ".join(breakdown)))
+
+    def set_render_scale(self, render_scale):
+        """
+        Method to set the resolution frames are drawn at, as a fraction of the display's resolution
+        Fonts are opened at the size they are drawn at. Everything else follows self.scale as it is drawn.
+        """
+        self.render_scale = render_scale
+        display_width, display_height = self.display.get_size()
+        size = (max(1, round(display_width * render_scale)), max(1, round(display_height * render_scale)))
+        if size == (display_width, display_height):
+            self.screen = self.display
+        elif self.screen is None or self.screen.get_size() != size:
+            self.screen = pygame.Surface(size).convert()
+        self.scale = (size[0] / self.window_width, size[1] / self.window_height)
+
+        self.font = font_cache.get_font("Helvetica", self.scaled(30))
+        self.title_font = font_cache.get_font("Helvetica", self.scaled(100))
+        self.small_font = font_cache.get_font("Helvetica", self.scaled(18))
+
+    def scaled(self, length):
+        """
+        Method to convert a length in layout coordinates to a whole number of pixels at the resolution frames are drawn
+        at, of at least 1
+        """
+        return max(1, round(length * self.scale[1]))
+
+    def to_screen(self, position):
+        """
+        Method to convert a position in layout coordinates to pixels at the resolution frames are drawn at
+        """
+        return position[0] * self.scale[0], position[1] * self.scale[1]
+
+    def blit_centred(self, image, y):
+        """
+        Method to draw an image centred horizontally on the screen, with its top at y in layout coordinates
+        """
+        self.screen.blit(image, ((self.screen.get_width() - image.get_width()) / 2, y * self.scale[1]))
+
+    def present(self):
+        """
+        Method to show the frame that has been drawn, scaling it up to the display's resolution if it was drawn lower
+        """
+        if self.screen is not self.display:
+            pygame.transform.scale(self.screen, self.display.get_size(), self.display)
+        pygame.display.flip()
 
     def title_screen(self):
-        scaled_image = pygame.transform.scale(self.sprite_images["lander_flames"], (200, 200))
+        title_text_img = self.title_font.render("MOON LANDER", True, (255, 255, 255))
+        subtitle_text_img = self.font.render("CLICK TO START GAME", True, (255, 255, 255))
         i = 0
 
         while True:
             # Clear the event queue
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    raise SystemExit
-                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    self.quit()
+                elif event.type == pygame.MOUSEBUTTONDOWN and self.check_loaded():
                     self.game_loop()
 
             self.screen.fill("black")
 
-            # Add text for the game title and loading
-            title_text_img = self.title_font.render("MOON LANDER", True, (255, 255, 255))
-            self.screen.blit(title_text_img, ((self.window_width / 2) - (title_text_img.get_width() / 2), 100))
-
-            subtitle_text_img = self.font.render("CLICK TO START GAME", True, (255, 255, 255))
-            self.screen.blit(subtitle_text_img, ((self.window_width / 2) - (subtitle_text_img.get_width() / 2), 575))
+            # Add text for the game title, or the loading progress until a game can be started
+            self.blit_centred(title_text_img, 100)
+            if self.check_loaded():
+                self.blit_centred(subtitle_text_img, 575)
+            else:
+                loading_text = "LOADING  {}%".format(text_cache.format_value(100 * self.moon.load_progress()))
+                self.blit_centred(self.text.render(self.font, loading_text, (255, 255, 255)), 575)
 
             """# Add current FPS to the screen
             fps_text = str(round(self.clock.get_fps()))
             fps_text_img = self.font.render(fps_text, True, (255, 255, 255))
             self.screen.blit(fps_text_img, (1220, 20))"""
 
-            display_pos = [(self.window_width/2)-(scaled_image.get_size()[0]/2), 300]
+            display_pos = [(self.window_width/2)-100, 300]
             display_pos[0] += 30*math.sin(math.pi*0.001*i)
             display_pos[1] += 30*math.sin(math.pi*0.0005*i)
             display_angle = 8*math.sin(math.pi*0.0008*i)
-            rotated_image = pygame.transform.rotate(scaled_image, display_angle)
+            rotated_image = self.rotation_cache.get(self.sprite_images["lander_flames"],
+                                                    (self.scaled(200), self.scaled(200)), display_angle)
             i += 1
-            self.screen.blit(rotated_image, display_pos)
+            self.screen.blit(rotated_image, self.to_screen(display_pos))
 
-            pygame.display.flip()
+            self.present()
+            self.report_startup()
             self.clock.tick()
 
     def game_loop(self):
         #self.rocket.reset((0, 1000), (0, 0))
-        self.rocket.reset((0, 5000), (25, 0))
+        start_position, start_velocity = (0, 5000), (25, 0)
+        self.rocket.reset(start_position, start_velocity)
         self.data_storage.clear()
+        self.telemetry_chart.clear()
         self.time = 0
+        self.dt = self.timestep.step_time / 100
+        self.timestep.reset()
+        self.start_recording({"seed": self.moon.noise.seed, "g": self.g, "position": start_position,
+                              "velocity": start_velocity})
+        frame_time = 0
         while True:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    raise SystemExit
+            self.profiler.start_frame()
+            self.handle_events()
+            self.profiler.mark("events")
 
-            # Get a list of keys currently being pressed
+            # Get a list of keys currently being pressed, and run the physics steps due since the last frame with them
             key_input = pygame.key.get_pressed()
-            # Handle key presses to control the rocket
-            if key_input[pygame.K_w]:
-                self.rocket.move_forward()
-            if key_input[pygame.K_a]:
-                self.rocket.turn_left()
-            if key_input[pygame.K_d]:
-                self.rocket.turn_right()
-
-            # Update sprites
-            self.rocket.update()
-            self.moon.update()
-            self.throttle_indicator.update(self.rocket.throttle)
-            self.height_indicator.update(self.rocket.height)
-
-            self.data_storage.log(self.time, round(self.rocket.height, 2))
+            steps = self.timestep.advance(frame_time)
+            self.update_frame(key_input[pygame.K_w], key_input[pygame.K_a], key_input[pygame.K_d], steps)
+            self.draw_frame(self.timestep.alpha)
+            frame_time = self.finish_frame()
 
-            self.screen.fill("black")
+    def finish_frame(self):
+        """
+        Method to show a frame of a flight and wait until the next is due, adjusting the resolution frames are drawn at
+        to the time they are taking
+        :return frame_time: time since the last frame in milliseconds
+        """
+        self.present()
+        self.profiler.mark("flip")
+        frame_time = self.clock.tick(self.max_fps)
+        self.profiler.mark("wait")
+        self.profiler.end_frame()
+        self.profiler_overlay.update(frame_time)
+
+        # The raw time of the tick does not include waiting for the frame to be due
+        if self.resolution_controller is not None and self.resolution_controller.update(self.clock.get_rawtime()):
+            self.set_render_scale(self.resolution_controller.scale)
+        return frame_time
+
+    def handle_events(self):
+        """
+        Method to handle the window events during a flight
+        """
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                self.quit()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.profiler_overlay.toggle()
 
-            # Draw objects to display
-            self.moon.draw()
-            self.rocket.draw()
-            self.throttle_indicator.draw()
-            self.height_indicator.draw()
+    def update_frame(self, forward, left, right, steps: int = 1):
+        """
+        Method to step the game on by one frame with the given control inputs
+        :param steps: number of physics steps to run this frame
+        """
+        for _ in range(steps):
+            self.step_physics(forward, left, right)
 
-            # Add current FPS to the screen
-            fps_text = str(round(self.clock.get_fps()))
-            fps_text_img = self.font.render(fps_text, True, (255, 255, 255))
-            self.screen.blit(fps_text_img, (1220, 20))
-
-            # Add current x and y velocity components to the screen
-            x_vel_text = "X VELOCITY:   "+str(round(self.rocket.velocity.x, 1))
-            x_vel_img = self.font.render(x_vel_text, True, (255, 255, 255))
-            self.screen.blit(x_vel_img, (50, 30))
-            y_vel_text = "Y VELOCITY:   "+str(round(self.rocket.velocity.y, 1))
-            y_vel_img = self.font.render(y_vel_text, True, (255, 255, 255))
-            self.screen.blit(y_vel_img, (50, 80))
-
-            # Add current x and y velocity components to the screen
-            x_pos_text = "X POS:   " + str(round(self.rocket.position.x, 1))
-            x_pos_img = self.font.render(x_pos_text, True, (255, 255, 255))
-            self.screen.blit(x_pos_img, (325, 30))
-            height_text = "HEIGHT:   " + str(round(self.rocket.height, 1))
-            height_img = self.font.render(height_text, True, (255, 255, 255))
-            self.screen.blit(height_img, (325, 80))
-
-            # Display fuel level on the screen
-            fuel_text = "FUEL:  "+str(round(self.rocket.fuel))
-            fuel_colour = (255, 255, 255) if self.rocket.fuel > 15 else (255, 0, 0)
-            fuel_text_img = self.font.render(fuel_text, True, fuel_colour)
-            self.screen.blit(fuel_text_img, (575, 30))
-
-            # Display TWR on the screen
-            twr_text = "TWR:  " + str(round(self.rocket.twr_max, 1))
-            twr_text_img = self.font.render(twr_text, True, (255, 255, 255))
-            self.screen.blit(twr_text_img, (575, 80))
-
-            # Update the display on screen
-            pygame.display.flip()
-            tick_time = self.clock.tick(60)
-            self.time += tick_time
-            self.dt = tick_time / 100
+        self.throttle_indicator.update(self.rocket.throttle)
+        self.height_indicator.update(self.rocket.height)
+        self.telemetry_chart.update(self.time, (self.rocket.height, self.rocket.velocity.mag, self.rocket.throttle))
+        self.profiler.mark("indicators")
+
+    def step_physics(self, forward, left, right):
+        """
+        Method to run one physics step of length dt with the given control inputs
+        """
+        # Handle key presses to control the rocket
+        if forward:
+            self.rocket.move_forward()
+        if left:
+            self.rocket.turn_left()
+        if right:
+            self.rocket.turn_right()
+        if self.recorder is not None:
+            self.recorder.record(self.time, self.dt, self.rocket, forward, left, right)
+        self.profiler.mark("input")
+
+        # Update sprites
+        self.rocket.update()
+        self.profiler.mark("rocket")
+        self.moon.update()
+        self.profiler.mark("moon")
+
+        self.data_storage.log(self.time, self.rocket.height, self.rocket.velocity.mag, self.rocket.throttle,
+                              self.rocket.fuel)
+        self.time += self.dt * 100
+        self.profiler.mark("log")
+
+    def draw_frame(self, alpha=1.0):
+        """
+        Method to draw the flight and the HUD to the screen
+        :param alpha: how far between the last two physics states to draw the rocket
+        """
+        self.screen.fill("black")
+
+        # Place the rocket first, as the view of the moon follows it
+        self.rocket.place(alpha)
+        self.moon.draw()
+        self.profiler.mark("moon draw")
+        self.rocket.draw()
+        self.throttle_indicator.draw()
+        self.height_indicator.draw()
+        self.telemetry_chart.draw()
+        self.profiler.mark("sprites")
+
+        # Add current FPS to the screen
+        fps_text = text_cache.format_value(self.clock.get_fps())
+        fps_text_img = self.text.render(self.font, fps_text, (255, 255, 255))
+        self.screen.blit(fps_text_img, self.to_screen((1220, 20)))
+
+        # Add current x and y velocity components to the screen
+        x_vel_text = "X VELOCITY:   "+text_cache.format_value(self.rocket.velocity.x, 1)
+        x_vel_img = self.text.render(self.font, x_vel_text, (255, 255, 255))
+        self.screen.blit(x_vel_img, self.to_screen((50, 30)))
+        y_vel_text = "Y VELOCITY:   "+text_cache.format_value(self.rocket.velocity.y, 1)
+        y_vel_img = self.text.render(self.font, y_vel_text, (255, 255, 255))
+        self.screen.blit(y_vel_img, self.to_screen((50, 80)))
+
+        # Add current x and y velocity components to the screen
+        x_pos_text = "X POS:   " + text_cache.format_value(self.rocket.position.x, 1)
+        x_pos_img = self.text.render(self.font, x_pos_text, (255, 255, 255))
+        self.screen.blit(x_pos_img, self.to_screen((325, 30)))
+        height_text = "HEIGHT:   " + text_cache.format_value(self.rocket.height, 1)
+        height_img = self.text.render(self.font, height_text, (255, 255, 255))
+        self.screen.blit(height_img, self.to_screen((325, 80)))
+
+        # Display fuel level on the screen
+        fuel_text = "FUEL:  "+text_cache.format_value(self.rocket.fuel)
+        fuel_colour = (255, 255, 255) if self.rocket.fuel > 15 else (255, 0, 0)
+        fuel_text_img = self.text.render(self.font, fuel_text, fuel_colour)
+        self.screen.blit(fuel_text_img, self.to_screen((575, 30)))
+
+        # Display TWR on the screen
+        twr_text = "TWR:  " + text_cache.format_value(self.rocket.twr_max, 1)
+        twr_text_img = self.text.render(self.font, twr_text, (255, 255, 255))
+        self.screen.blit(twr_text_img, self.to_screen((575, 80)))
+
+        self.profiler_overlay.draw()
+        self.profiler.mark("hud")
+
+    def replay(self, path, speed=1.0):
+        """
+        Method to replay a recorded flight on screen, applying the recorded inputs with the recorded timesteps so that
+        the flight is reproduced exactly. Frames are only drawn when the replay is keeping up with the playback rate.
+        :param path: path of the flight recording
+        :param speed: playback rate (2 is twice real time)
+        """
+        import flight_recorder
+        metadata, records = flight_recorder.read_recording(path)
+        self.stop_recording()
+        self.rocket.reset(metadata["position"], metadata["velocity"])
+        self.data_storage.clear()
+        self.telemetry_chart.clear()
+
+        steps = list(zip(records["time"].tolist(), records["dt"].tolist(),
+                         *(flags.tolist() for flags in flight_recorder.unpack_inputs(records["inputs"]))))
+        start_time = pygame.time.get_ticks()
+        first_time = steps[0][0] if steps else 0
+        i = 0
+        while i < len(steps):
+            self.profiler.start_frame()
+            self.handle_events()
+            self.profiler.mark("events")
+
+            # Run every recorded step that is due at the playback rate, whatever the rate it was recorded at
+            due_time = first_time + (pygame.time.get_ticks() - start_time) * speed
+            while i < len(steps) and steps[i][0] <= due_time:
+                record_time, self.dt, forward, left, right = steps[i]
+                self.time = record_time
+                self.step_physics(forward, left, right)
+                i += 1
+            self.update_frame(False, False, False, 0)
+
+            self.draw_frame()
+            self.finish_frame()
+
+        self.title_screen()
+
+    def start_recording(self, metadata):
+        """
+        Method to start recording a new flight to the recording directory
+        """
+        self.stop_recording()
+        if self.recording_dir is None:
+            return
+
+        # The recorder is only imported once a flight is recorded, keeping it out of the startup path
+        import flight_recorder
+        os.makedirs(self.recording_dir, exist_ok=True)
+        now = time.time()
+        name = "flight-{}-{:03d}".format(time.strftime("%Y%m%d-%H%M%S", time.localtime(now)), int(now % 1 * 1000))
+        path = os.path.join(self.recording_dir, name + ".mlfr")
+        # Flights started within the same millisecond are told apart by a suffix rather than overwriting each other
+        suffix = 1
+        while self.recorder is None:
+            try:
+                self.recorder = flight_recorder.FlightRecorder(path, metadata)
+            except FileExistsError:
+                suffix += 1
+                path = os.path.join(self.recording_dir, "{}-{}.mlfr".format(name, suffix))
+
+    def stop_recording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            self.recorder = None
+
+    def quit(self):
+        """
+        Method to close the game, finishing the flight recording and writing out the frame profile
+        """
+        self.stop_recording()
+        if self.profile_path is not None and len(self.profiler):
+            directory = os.path.dirname(self.profile_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.profiler.dump(self.profile_path)
+        pygame.quit()
+        raise SystemExit
 
     def game_over(self, ending):
         """
         Method to display the game over screen
         """
+        self.stop_recording()
         if ending == "crash":
             message = "CRASH"
         else:
@@ -209,24 +506,31 @@ class MoonLander:
         game_over_text_img = self.title_font.render(message, True, (255, 255, 255))
         replay_text_img = self.font.render("CLICK TO REPLAY", True, (255, 255, 255))
 
-        graph = pygraph.line_graph(self.data_storage.get_log(), (640, 360), ("Time", "Height"))
+        # Show the rocket where it came to rest, with the image for how it landed
+        self.rocket.place()
+
+        # Graph the height on the left axis, with the speed and throttle on the right axis
+        graph = pygraph.multiline_graph(self.data_storage.get_log("time", "height", "velocity", "throttle"),
+                                        (640, 360), ("Time", "Height", "Speed / Throttle"),
+                                        labels=("Height", "Speed", "Throttle"), secondary=(1, 2))
+        if self.scale != (1, 1):
+            graph = pygame.transform.smoothscale(graph, (self.scaled(640), self.scaled(360)))
 
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
-                    raise SystemExit
+                    self.quit()
                 elif event.type == pygame.MOUSEBUTTONDOWN:
                     self.game_loop()
 
             self.screen.fill("black")
             self.moon.draw()
             self.rocket.draw()
-            self.screen.blit(game_over_text_img, ((self.window_width/2)-(game_over_text_img.get_width()/2), 75))
-            self.screen.blit(replay_text_img, ((self.window_width/2)-(replay_text_img.get_width()/2), 200))
-            self.screen.blit(graph, ((self.window_width/2)-(graph.get_width()/2), 300))
+            self.blit_centred(game_over_text_img, 75)
+            self.blit_centred(replay_text_img, 200)
+            self.blit_centred(graph, 300)
 
-            pygame.display.flip()
+            self.present()
             self.clock.tick(60)
 
 
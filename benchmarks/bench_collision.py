@@ -0,0 +1,61 @@
+"""
+Benchmark of finding colliding pairs among many bodies, by testing every pair against using spatial_hash.SpatialHash
+as a broad phase
+Run from the repository root with: python benchmarks/bench_collision.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import physics
+import spatial_hash
+
+# Bodies are spread at a constant density, so the number of real contacts grows linearly with the number of bodies
+DENSITY = 1 / 40000
+
+
+def make_bodies(n, seed=0):
+    rng = random.Random(seed)
+    width = (n / DENSITY) ** 0.5
+    return [physics.Body((rng.uniform(10, 75), rng.uniform(10, 75)), (rng.uniform(0, width), rng.uniform(0, width)),
+                         init_angle=rng.uniform(-3.14, 3.14)) for _ in range(n)]
+
+
+def brute_force(bodies):
+    aabbs = [body.aabb() for body in bodies]
+    pairs = []
+    for i in range(len(bodies)):
+        for j in range(i + 1, len(bodies)):
+            a, b = aabbs[i], aabbs[j]
+            if a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]:
+                pairs.append((bodies[i], bodies[j]))
+    return pairs
+
+
+def hashed(bodies, grid):
+    grid.build(bodies)
+    return grid.candidate_pairs()
+
+
+def bench(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, len(result)
+
+
+if __name__ == "__main__":
+    grid = spatial_hash.SpatialHash(cell_size=128)
+    print("{:>8}{:>10}{:>18}{:>18}".format("bodies", "pairs", "brute force ms", "spatial hash ms"))
+    for n in (100, 500, 1000, 2000, 5000):
+        bodies = make_bodies(n)
+        hash_time, hash_pairs = bench(hashed, bodies, grid)
+        if n <= 2000:
+            brute_time, brute_pairs = bench(brute_force, bodies)
+            assert brute_pairs == hash_pairs
+            brute = "{:.1f}".format(brute_time * 1e3)
+        else:
+            brute = "-"
+        print("{:>8}{:>10}{:>18}{:>18.1f}".format(n, hash_pairs, brute, hash_time * 1e3))
@@ -0,0 +1,62 @@
+"""
+Benchmark of environment steps per second for controller training, comparing one LanderEnv, a VectorLanderEnv and a
+SubprocVectorLanderEnv split across worker processes
+Run from the repository root with: python benchmarks/bench_env.py [landers] [processes]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import env
+
+SEED = 7
+DURATION = 2.0
+
+
+def controller(observations):
+    # Fire the engine whenever the lander is falling faster than 8
+    return np.stack((observations[..., 1] < -8, np.zeros_like(observations[..., 1], dtype=bool),
+                     np.zeros_like(observations[..., 1], dtype=bool)), axis=-1)
+
+
+def time_single():
+    single = env.LanderEnv(seed=SEED)
+    observation, _ = single.reset()
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        observation, _, terminated, truncated, _ = single.step(controller(observation))
+        steps += 1
+        if terminated or truncated:
+            observation, _ = single.reset()
+    return steps / (time.perf_counter() - start)
+
+
+def time_vector(vector_env):
+    observations, _ = vector_env.reset()
+    steps = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        observations = vector_env.step(controller(observations))[0]
+        steps += vector_env.num_envs
+    return steps / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    print("{:<30}{:>16}".format("environment", "steps/s"))
+    print("{:<30}{:>16.0f}".format("LanderEnv", time_single()))
+    print("{:<30}{:>16.0f}".format("VectorLanderEnv({})".format(n), time_vector(env.VectorLanderEnv(n, seed=SEED))))
+    with env.SubprocVectorLanderEnv(n, processes, seed=SEED) as subproc_env:
+        name = "SubprocVectorLanderEnv({}, {})".format(n, len(subproc_env.sizes))
+        print("{:<30}{:>16.0f}".format(name, time_vector(subproc_env)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark of the accuracy against cost of each integrator, measured against analytic trajectories
+Run from the repository root with: python benchmarks/bench_integrators.py
+
+Two cases are flown for 60 s of simulated time:
+    ballistic - free fall under the moon's gravity with a horizontal starting velocity
+    turning burn - full thrust while the lander turns at a constant rate, so the acceleration changes through each step
+"""
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import integrators
+
+G = 1.5
+TWR = 2.0
+OMEGA = 0.9
+START = (0.0, 5000.0, 25.0, 0.0)
+DURATION = 60.0
+
+
+def ballistic_acceleration(x, y, vx, vy, t):
+    return 0.0, -G
+
+
+def ballistic_exact(t):
+    x, y, vx, vy = START
+    return x + vx*t, y + vy*t - 0.5*G*t*t
+
+
+def make_turning_acceleration():
+    """
+    Function to return an acceleration function for a lander turning at OMEGA under full thrust, which needs to know
+    the time at the start of each step
+    """
+    state = {"time": 0.0}
+
+    def acceleration(x, y, vx, vy, t):
+        angle = OMEGA * (state["time"] + t)
+        return math.sin(angle)*TWR, math.cos(angle)*TWR - G
+    return acceleration, state
+
+
+def turning_exact(t):
+    x, y, vx, vy = START
+    k = TWR / OMEGA
+    angle = OMEGA * t
+    return (x + vx*t + k*(t - math.sin(angle)/OMEGA),
+            y + vy*t + k*(1 - math.cos(angle))/OMEGA - 0.5*G*t*t)
+
+
+def fly(integrator, acceleration, state, dt):
+    x, y, vx, vy = START
+    steps = round(DURATION / dt)
+    for i in range(steps):
+        if state is not None:
+            state["time"] = i * dt
+        x, y, vx, vy = integrator(x, y, vx, vy, acceleration, dt)
+    return x, y
+
+
+def bench(name, case, dt):
+    integrator = integrators.get(name)
+    if case == "ballistic":
+        acceleration, state, exact = ballistic_acceleration, None, ballistic_exact
+    else:
+        (acceleration, state), exact = make_turning_acceleration(), turning_exact
+
+    start = time.perf_counter()
+    x, y = fly(integrator, acceleration, state, dt)
+    elapsed = time.perf_counter() - start
+
+    exact_x, exact_y = exact(DURATION)
+    return math.hypot(x - exact_x, y - exact_y), elapsed / DURATION
+
+
+if __name__ == "__main__":
+    print("{:<14}{:<22}{:>8}{:>16}{:>20}".format("case", "integrator", "dt", "position error", "us per simulated s"))
+    for case in ("ballistic", "turning burn"):
+        for name in integrators.INTEGRATORS:
+            for dt in (0.5, 0.16, 0.05, 0.016):
+                error, cost = bench(name, case, dt)
+                print("{:<14}{:<22}{:>8}{:>16.3g}{:>20.1f}".format(case, name, dt, error, cost * 1e6))
@@ -0,0 +1,42 @@
+"""
+Benchmark comparing terrain generation with the per-point perlin_noise loop against the vectorized TerrainNoise
+Run from the repository root with: python benchmarks/bench_terrain.py [number of points]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import perlin_noise
+import terrain
+
+
+def per_point_heights(n, seed):
+    """
+    The original Moon.load loop, one PerlinNoise call per sample
+    """
+    p = perlin_noise.PerlinNoise(octaves=3, seed=seed)
+    return [150 + 500*p(i*0.0005) for i in range(n)]
+
+
+def vectorized_heights(n, seed):
+    return terrain.TerrainNoise(octaves=3, seed=seed).heights(0, n)
+
+
+def bench(func, n, seed=42):
+    start = time.perf_counter()
+    func(n, seed)
+    elapsed = time.perf_counter() - start
+    return elapsed, n / elapsed
+
+
+if __name__ == "__main__":
+    num_points = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    old_time, old_rate = bench(per_point_heights, num_points)
+    print("perlin_noise loop: {:>10.3f} s  {:>14,.0f} points/s".format(old_time, old_rate))
+
+    for n in (num_points, 10*num_points):
+        new_time, new_rate = bench(vectorized_heights, n)
+        print("TerrainNoise ({:,} points): {:>10.3f} s  {:>14,.0f} points/s".format(n, new_time, new_rate))
@@ -0,0 +1,34 @@
+"""
+Microbenchmark comparing vector.vector with the slotted vector.vector2 used by the physics
+Run from the repository root with: python benchmarks/bench_vector.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import vector as v
+
+# Each case is timed with a and b set up as vectors of the class being tested
+CASES = {
+    "construct": "cls(1.5, -2.5)",
+    "add": "a + b",
+    "scalar mul": "a * 0.01",
+    "euler step": "a += b * 0.01",
+    "magnitude read": "a.mag",
+}
+
+
+def bench(cls, statement, number=200000):
+    times = timeit.repeat(statement, setup="a = cls(3.0, 4.0); b = cls(1.5, -2.5)", globals={"cls": cls},
+                          number=number, repeat=5)
+    return number / min(times)
+
+
+if __name__ == "__main__":
+    print("{:<12}{:>16}{:>16}{:>10}".format("", "vector ops/s", "vector2 ops/s", "speedup"))
+    for name, statement in CASES.items():
+        old_rate = bench(v.vector, statement)
+        new_rate = bench(v.vector2, statement)
+        print("{:<12}{:>16,.0f}{:>16,.0f}{:>9.1f}x".format(name, old_rate, new_rate, new_rate / old_rate))
@@ -0,0 +1,255 @@
+"""
+Headless benchmark suite for the game's hot paths
+Runs every benchmark under SDL's dummy video driver, writes the results as JSON and compares them against stored
+baselines, failing if any benchmark has become slower than its baseline by more than the threshold.
+
+Run from the repository root with:
+    python benchmarks/suite.py                      compare against benchmarks/baseline.json
+    python benchmarks/suite.py --save-baseline      store this machine's results as the baseline
+    python benchmarks/suite.py --output results.json --threshold 0.1 --filter moon
+
+Baselines are only meaningful on the machine they were recorded on, so record them on the target hardware.
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import pygame
+
+import Moon_Lander
+import datalogger
+import moon
+import pygraph
+import vector as v
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+BENCHMARKS = {}
+
+
+def benchmark(number):
+    """
+    Decorator to register a benchmark. The decorated function is called with the game and returns (setup, run): setup
+    is called before each timed repeat (or is None) and run is the operation timed, called number times per repeat
+    """
+    def register(function):
+        BENCHMARKS[function.__name__] = (function, number)
+        return function
+    return register
+
+
+class HeadlessGame(Moon_Lander.MoonLander):
+    """
+    The game without its screen loops, so its parts can be driven one at a time
+    """
+
+    def title_screen(self):
+        pass
+
+    def game_over(self, ending):
+        self.ending = ending
+
+
+@benchmark(number=100000)
+def vector_arithmetic(game):
+    a = v.vector2(3.0, 4.0)
+    b = v.vector2(1.5, -2.5)
+
+    def run():
+        (a + b * 0.01).mag
+    return None, run
+
+
+@benchmark(number=3)
+def moon_load(game):
+    # Load a new moon each time with an empty cache, so this times generating the terrain
+    directory = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, directory, True)
+    state = {}
+
+    def setup():
+        if "moon" in state:
+            state["moon"].loader.close()
+        state["moon"] = moon.Moon(game, seed=random.randint(1, 1000), cache_dir=tempfile.mkdtemp(dir=directory))
+
+    def run():
+        state["moon"].terrain.prefetch(*state["moon"].spawn_range())
+    return setup, run
+
+
+@benchmark(number=2000)
+def moon_draw(game):
+    return None, game.moon.draw
+
+
+@benchmark(number=1000)
+def rocket_update(game):
+    def setup():
+        game.rocket.reset((0, 5000), (25, 0))
+
+    def run():
+        game.rocket.move_forward()
+        game.rocket.update()
+    return setup, run
+
+
+@benchmark(number=2000)
+def sprite_draw(game):
+    def run():
+        game.rocket.place(0.5)
+        game.rocket.draw()
+    return None, run
+
+
+@benchmark(number=20)
+def line_graph(game):
+    logger = _flight_log(20000)
+    data = logger.get_log()
+    return None, lambda: pygraph.line_graph(data, (640, 360), ("Time", "Height"))
+
+
+@benchmark(number=20000)
+def datalogger_get_log(game):
+    logger = _flight_log(20000)
+    return None, lambda: logger.get_log("time", "height", "velocity", "throttle", "fuel")
+
+
+@benchmark(number=300)
+def full_frame(game):
+    # One 60 fps frame of the game loop with the engine firing: the physics steps due in the frame, drawing the scene
+    # and HUD and flipping the display
+    def setup():
+        game.rocket.reset((0, 5000), (25, 0))
+        game.data_storage.clear()
+        game.timestep.reset()
+        game.time = 0
+
+    def run():
+        game.update_frame(True, False, False, game.timestep.advance(1000 / 60))
+        game.draw_frame(game.timestep.alpha)
+        game.present()
+    return setup, run
+
+
+def _flight_log(n):
+    logger = datalogger.DataLogger()
+    for i in range(n):
+        logger.log(i * 16, 5000 - i * 0.2, 25 + i * 0.001, 50 * (i % 300 > 150), 100 - i * 0.004)
+    return logger
+
+
+def run_benchmark(game, name, repeat):
+    """
+    Function to time a benchmark
+    :return result: dictionary of the median and minimum time per call over the repeats, in microseconds
+    """
+    function, number = BENCHMARKS[name]
+    setup, run = function(game)
+
+    # Untimed warm up, to fill caches the same way they are full during play
+    if setup is not None:
+        setup()
+    run()
+
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        times.append((time.perf_counter() - start) / number * 1e6)
+    return {"median_us": statistics.median(times), "min_us": min(times), "number": number, "repeat": repeat}
+
+
+def compare(results, baseline, threshold):
+    """
+    Function to compare results against baseline results
+    :return regressions: list of (name, baseline median, median) for each benchmark slower than the threshold allows
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]["median_us"]
+        if result["median_us"] > old * (1 + threshold):
+            regressions.append((name, old, result["median_us"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the headless benchmark suite")
+    parser.add_argument("--output", help="file to write the results to as JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fraction a benchmark may be slower than its baseline before it fails (default 0.25)")
+    parser.add_argument("--filter", default="", help="only run benchmarks whose names match this regular expression")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed repeats of each benchmark")
+    args = parser.parse_args(argv)
+    output = None if args.output is None else os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.baseline)
+
+    # The game loads its assets relative to the repository root
+    os.chdir(ROOT)
+    # SDL's scaling of the display to the window is left out, as it is done in software under the dummy video driver
+    game = HeadlessGame(recording_dir=None, profile_path=None, scale_to_window=False)
+    game.loading_screen()
+    game.rocket.reset((0, 5000), (25, 0))
+
+    results = {}
+    print("{:<22}{:>14}{:>14}".format("benchmark", "median us", "min us"))
+    for name in BENCHMARKS:
+        if re.search(args.filter, name):
+            results[name] = run_benchmark(game, name, args.repeat)
+            print("{:<22}{:>14.2f}{:>14.2f}".format(name, results[name]["median_us"], results[name]["min_us"]))
+
+    report = {"machine": platform.platform(), "python": platform.python_version(),
+              "pygame": pygame.version.ver, "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}
+    if output:
+        with open(output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    if args.save_baseline:
+        # Keep the baselines of any benchmarks that were filtered out of this run
+        baseline = {}
+        if os.path.exists(baseline_path):
+            with open(baseline_path) as baseline_file:
+                baseline = json.load(baseline_file)["results"]
+        baseline.update(results)
+        report["results"] = baseline
+        with open(baseline_path, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print("Saved baseline to {}".format(baseline_path))
+        return
+
+    if not os.path.exists(baseline_path):
+        print("No baseline at {}, run with --save-baseline to record one".format(baseline_path))
+        return
+
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    for name, old, new in regressions:
+        print("REGRESSION {}: {:.2f} us -> {:.2f} us ({:+.0%})".format(name, old, new, new / old - 1))
+    if regressions:
+        raise SystemExit(1)
+    print("No regressions beyond {:.0%} of the baseline".format(args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,86 @@
+"""
+Data logger for the flight telemetry
+Stores each channel in its own preallocated numpy column, so logging a sample does not allocate any objects and the log
+can be read back as views of the columns without copying
+"""
+import numpy as np
+
+
 class DataLogger:
-    def __init__(self):
-        self._datalog = []
+    """
+    Class to log the flight telemetry, one column per channel
+
+    By default the columns grow (doubling in size) as samples are logged. In ring mode the logger has a fixed capacity
+    and keeps only the latest samples; each sample is written twice, capacity apart, so the latest samples are always
+    one contiguous slice of the column.
+    """
+
+    CHANNELS = (("time", np.float64),
+                ("height", np.float32),
+                ("velocity", np.float32),
+                ("throttle", np.float32),
+                ("fuel", np.float32))
+
+    def __init__(self, capacity: int = 4096, ring: bool = False):
+        """
+        :param capacity: number of samples space is allocated for, and the number kept in ring mode
+        :param ring: whether to keep only the latest capacity samples instead of growing
+        """
+        self.capacity = capacity
+        self.ring = ring
+        self._columns = {name: np.zeros(2*capacity if ring else capacity, dtype=dtype)
+                         for name, dtype in self.CHANNELS}
+        self._count = 0
+
+    def log(self, time, height, velocity=0.0, throttle=0.0, fuel=0.0):
+        """
+        Method to log a sample of each channel
+        """
+        i = self._count
+        if self.ring:
+            i %= self.capacity
+            self._write(i + self.capacity, time, height, velocity, throttle, fuel)
+        elif i == len(self._columns["time"]):
+            self._grow()
+
+        self._write(i, time, height, velocity, throttle, fuel)
+        self._count += 1
+
+    def _write(self, i, time, height, velocity, throttle, fuel):
+        columns = self._columns
+        columns["time"][i] = time
+        columns["height"][i] = height
+        columns["velocity"][i] = velocity
+        columns["throttle"][i] = throttle
+        columns["fuel"][i] = fuel
+
+    def _grow(self):
+        for name, column in self._columns.items():
+            grown = np.zeros(2*len(column), dtype=column.dtype)
+            grown[:len(column)] = column
+            self._columns[name] = grown
+
+    def get_log(self, *channels):
+        """
+        Method to return the logged samples of each channel asked for (time and height by default), oldest first
 
-    def log(self, time, data):
-        self._datalog.append([time, data])
+        The columns returned are views of the logger's storage rather than copies. In ring mode they will be overwritten
+        by later samples, so copy them if they need to outlive the next call to log.
 
-    def get_log(self):
-        data_out = [[], []]
-        for i in range(len(self._datalog)):
-            data_out[0].append(self._datalog[i][0])
-            data_out[1].append(self._datalog[i][1])
+        :param channels: names of the channels to return
+        :return data: list with an array for each channel
+        """
+        channels = channels or ("time", "height")
+        if self.ring and self._count > self.capacity:
+            start = self._count % self.capacity
+            stop = start + self.capacity
+        else:
+            start = 0
+            stop = self._count
+        return [self._columns[name][start:stop] for name in channels]
 
-        return data_out
+    def __len__(self):
+        return min(self._count, self.capacity) if self.ring else self._count
 
     def clear(self):
-        self._datalog = []
+        self._count = 0
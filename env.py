@@ -0,0 +1,367 @@
+"""
+Reinforcement-learning environments for training Moon Lander controllers
+Wraps the headless physics of simulation.py in reset/step environments following the Gym API, without depending on
+gym. LanderEnv flies one lander, VectorLanderEnv flies many in lockstep as one BatchSimulation and
+SubprocVectorLanderEnv splits a vectorized environment across worker processes.
+
+Observations are what the game shows during a flight: the x and y velocity, height above the ground, fuel, angle,
+throttle and maximum thrust to weight ratio. Actions are three flags: fire the engine, turn left and turn right.
+"""
+import math
+import multiprocessing
+import random
+
+import numpy as np
+
+import simulation
+
+OBSERVATIONS = ("vx", "vy", "height", "fuel", "angle", "throttle", "twr")
+ACTIONS = ("forward", "left", "right")
+
+FLYING = simulation.FLYING
+SAFE = simulation.SAFE
+CRASH = simulation.CRASH
+
+
+class Box:
+    """
+    Space of arrays of real numbers between low and high, as gym.spaces.Box
+    """
+
+    def __init__(self, low, high, dtype=np.float32):
+        self.low = np.asarray(low, dtype=dtype)
+        self.high = np.asarray(high, dtype=dtype)
+        self.shape = self.low.shape
+        self.dtype = np.dtype(dtype)
+
+    def sample(self, rng=None):
+        # Unbounded dimensions are sampled between -1 and 1
+        rng = np.random.default_rng() if rng is None else rng
+        low = np.where(np.isfinite(self.low), self.low, -1)
+        high = np.where(np.isfinite(self.high), self.high, 1)
+        return rng.uniform(low, high).astype(self.dtype)
+
+    def contains(self, x):
+        x = np.asarray(x)
+        return x.shape == self.shape and bool(np.all((x >= self.low) & (x <= self.high)))
+
+
+class MultiBinary:
+    """
+    Space of arrays of n flags, as gym.spaces.MultiBinary
+    """
+
+    def __init__(self, n: int):
+        self.n = n
+        self.shape = (n,)
+        self.dtype = np.dtype(np.int8)
+
+    def sample(self, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        return rng.integers(0, 2, self.n, dtype=self.dtype)
+
+    def contains(self, x):
+        x = np.asarray(x)
+        return x.shape == self.shape and bool(np.all((x == 0) | (x == 1)))
+
+
+OBSERVATION_SPACE = Box((-np.inf, -np.inf, -np.inf, 0, -math.pi, 0, 0), (np.inf, np.inf, np.inf, 100, math.pi, 50, 5))
+ACTION_SPACE = MultiBinary(len(ACTIONS))
+
+
+def landing_reward(observation, status, touchdown_speed):
+    """
+    Default reward function, only rewarding the end of a flight: 100 plus the fuel left for a safe landing and -100 for a
+    crash. Works on a single lander or on arrays of landers.
+    :param observation: observation after the step
+    :param status: FLYING, or SAFE or CRASH on the step the lander touched down
+    :param touchdown_speed: speed the lander touched down at
+    :return reward:
+    """
+    fuel = observation[..., 3]
+    return np.where(status == SAFE, 100 + fuel, np.where(status == CRASH, -100.0, 0.0))
+
+
+def _wrap_angle(angle):
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+def _terrain_seed(seed):
+    """
+    Function to return the terrain seed to fly over, chosen at random if seed is None
+    TerrainNoise picks a new random seed whenever it is given 0, so 0 is rejected rather than giving different terrain
+    each time it is used.
+    """
+    if seed is None:
+        return random.randint(1, 1000)
+    if seed == 0:
+        raise ValueError("terrain seed expected to be non-zero")
+    return seed
+
+
+class LanderEnv:
+    """
+    Class to fly a single lander through reset and step
+    """
+    observation_space = OBSERVATION_SPACE
+    action_space = ACTION_SPACE
+
+    def __init__(self, seed=None, g=1.5, dt=0.16, max_steps: int = 5000, start_position=(0, 5000),
+                 start_velocity=(25, 0), integrator="semi_implicit_euler", reward=landing_reward):
+        """
+        :param seed: non-zero terrain seed, chosen at random if not given
+        :param g: gravitational acceleration
+        :param dt: simulation timestep of each step
+        :param max_steps: number of steps after which a flight is truncated
+        :param start_position: position flights start from
+        :param start_velocity: velocity flights start with
+        :param integrator: name of the integrator from integrators.INTEGRATORS used to move the lander
+        :param reward: function of (observation, status, touchdown_speed) returning the reward of a step
+        """
+        self.g = g
+        self.dt = dt
+        self.max_steps = max_steps
+        self.start_position = start_position
+        self.start_velocity = start_velocity
+        self.integrator = integrator
+        self.reward = reward
+
+        self.sim = simulation.Simulation(_terrain_seed(seed), g, integrator=integrator)
+        self.steps = 0
+
+    def reset(self, seed=None, position=None, velocity=None):
+        """
+        Method to start a new flight
+        :param seed: optional non-zero terrain seed, changing the terrain if it is not the current one
+        :param position: optional starting position in place of start_position
+        :param velocity: optional starting velocity in place of start_velocity
+        :return observation, info:
+        """
+        if seed is not None and _terrain_seed(seed) != self.sim.noise.seed:
+            self.sim = simulation.Simulation(seed, self.g, integrator=self.integrator)
+        self.sim.reset(self.start_position if position is None else position,
+                       self.start_velocity if velocity is None else velocity)
+        self.steps = 0
+        return self.observe(), {"seed": self.sim.noise.seed}
+
+    def step(self, action):
+        """
+        Method to advance the flight by one timestep
+        :param action: (forward, left, right) flags
+        :return observation, reward, terminated, truncated, info: terminated is True once the lander has touched down,
+        truncated once max_steps have been taken without touching down
+        """
+        forward, left, right = (bool(flag) for flag in action)
+        # The lander is stopped when it touches down, at the speed it had going into the step
+        speed = self.sim.lander.velocity.mag
+        outcome = self.sim.step(self.dt, forward, left, right)
+        self.steps += 1
+
+        observation = self.observe()
+        status = FLYING if outcome is None else SAFE if outcome == "safe" else CRASH
+        touchdown_speed = speed if outcome is not None else 0.0
+        terminated = outcome is not None
+        truncated = not terminated and self.steps >= self.max_steps
+        reward = float(self.reward(observation, status, touchdown_speed))
+        info = {"outcome": outcome, "touchdown_speed": touchdown_speed, "time": self.sim.time}
+        return observation, reward, terminated, truncated, info
+
+    def observe(self):
+        """
+        Method to return the observation of the lander's current state
+        """
+        lander = self.sim.lander
+        height = lander.position.y - lander.scale[1] / 2 - self.sim.terrain.interpolate(lander.position.x)
+        return np.array((lander.velocity.x, lander.velocity.y, height, max(lander.fuel, 0), _wrap_angle(lander.angle),
+                         lander.throttle, lander.twr_max), dtype=np.float32)
+
+
+class VectorLanderEnv:
+    """
+    Class to fly n landers in lockstep over the same terrain, without rendering
+
+    Every call to step advances all the landers by one timestep as a simulation.BatchSimulation. A lander whose flight
+    has ended is restarted straight away, so each step returns the first observation of its next flight, with the last
+    observation of the flight that ended in info["final_observation"].
+    """
+    observation_space = OBSERVATION_SPACE
+    action_space = ACTION_SPACE
+
+    def __init__(self, n: int, seed=None, g=1.5, dt=0.16, max_steps: int = 5000, start_position=(0, 5000),
+                 start_velocity=(25, 0), integrator="semi_implicit_euler", reward=landing_reward):
+        """
+        :param n: number of landers
+        :param seed: non-zero terrain seed, chosen at random if not given
+        :param g: gravitational acceleration
+        :param dt: simulation timestep of each step
+        :param max_steps: number of steps after which a flight is truncated
+        :param start_position: position flights start from, either one for every lander or an array of shape (n, 2)
+        :param start_velocity: velocity flights start with, either one for every lander or an array of shape (n, 2)
+        :param integrator: name of the integrator from integrators.INTEGRATORS used to move the landers
+        :param reward: function of (observations, statuses, touchdown speeds) returning the reward of each lander
+        """
+        self.num_envs = n
+        self.dt = dt
+        self.max_steps = max_steps
+        self.start_position = np.broadcast_to(np.asarray(start_position, dtype=np.float64), (n, 2))
+        self.start_velocity = np.broadcast_to(np.asarray(start_velocity, dtype=np.float64), (n, 2))
+        self.reward = reward
+
+        self.sim = simulation.BatchSimulation(n, _terrain_seed(seed), g, integrator)
+        self.steps = np.zeros(n, dtype=np.int64)
+
+    def reset(self, position=None, velocity=None):
+        """
+        Method to start a new flight for every lander
+        :param position: optional starting positions in place of start_position
+        :param velocity: optional starting velocities in place of start_velocity
+        :return observations, info:
+        """
+        self.sim.reset(self.start_position if position is None else position,
+                       self.start_velocity if velocity is None else velocity)
+        self.steps[:] = 0
+        return self.observe(), {"seed": self.sim.noise.seed}
+
+    def step(self, actions):
+        """
+        Method to advance every lander by one timestep
+        :param actions: array of shape (n, 3) of (forward, left, right) flags
+        :return observations, rewards, terminated, truncated, info: arrays with one element per lander. info holds the
+        "final_observation" of every lander and the "status" (FLYING, SAFE or CRASH) and "touchdown_speed" of the
+        landers that touched down.
+        """
+        actions = np.asarray(actions, dtype=bool)
+        sim = self.sim
+        sim.step(self.dt, actions[:, 0], actions[:, 1], actions[:, 2])
+        self.steps += 1
+
+        observations = self.observe()
+        terminated = ~sim.flying
+        truncated = ~terminated & (self.steps >= self.max_steps)
+        status = sim.status.copy()
+        touchdown_speed = sim.touchdown_speed.copy()
+        rewards = self.reward(observations, status, touchdown_speed)
+        info = {"final_observation": observations.copy(), "status": status, "touchdown_speed": touchdown_speed}
+
+        # Restart the landers whose flights have ended
+        done = terminated | truncated
+        if done.any():
+            sim.reset(self.start_position[done], self.start_velocity[done], lanes=done)
+            self.steps[done] = 0
+            observations[done] = self.observe()[done]
+        return observations, rewards, terminated, truncated, info
+
+    def observe(self):
+        """
+        Method to return the observation of every lander's current state, as an array of shape (n, 7)
+        """
+        sim = self.sim
+        observations = np.empty((self.num_envs, len(OBSERVATIONS)), dtype=np.float32)
+        observations[:, 0] = sim.vx
+        observations[:, 1] = sim.vy
+        observations[:, 2] = sim.y - sim.half_height - sim.ground_height(sim.x)
+        observations[:, 3] = np.maximum(sim.fuel, 0)
+        observations[:, 4] = _wrap_angle(sim.angle)
+        observations[:, 5] = sim.throttle
+        observations[:, 6] = np.where(sim.fuel > 0, sim.max_throttle / sim.m, 0)
+        return observations
+
+    def close(self):
+        pass
+
+
+class SubprocVectorLanderEnv:
+    """
+    Class to fly n landers in lockstep split across worker processes, each running a VectorLanderEnv over the same
+    terrain. Steps are sent to every worker before waiting for any of them, so the workers step in parallel.
+    It behaves as a VectorLanderEnv of n landers, and should be closed (or used as a context manager) when done.
+    """
+    observation_space = OBSERVATION_SPACE
+    action_space = ACTION_SPACE
+
+    def __init__(self, n: int, processes=None, seed=None, **kwargs):
+        """
+        :param n: number of landers
+        :param processes: number of worker processes, defaulting to one per core
+        :param seed: non-zero terrain seed, chosen at random if not given
+        :param kwargs: other arguments to VectorLanderEnv, which must be picklable
+        """
+        self.num_envs = n
+        processes = min(n, processes or multiprocessing.cpu_count())
+        # Every worker must fly over the same terrain
+        seed = _terrain_seed(seed)
+
+        self.sizes = [len(lanes) for lanes in np.array_split(np.arange(n), processes)]
+        self._splits = np.cumsum(self.sizes)[:-1]
+        self._connections = []
+        self._processes = []
+        for size in self.sizes:
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker, args=(worker_connection, size, seed, kwargs), daemon=True)
+            process.start()
+            worker_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+    def reset(self, position=None, velocity=None):
+        """
+        Method to start a new flight for every lander, as VectorLanderEnv.reset
+        """
+        positions = self._split(position)
+        velocities = self._split(velocity)
+        for connection, worker_position, worker_velocity in zip(self._connections, positions, velocities):
+            connection.send(("reset", (worker_position, worker_velocity)))
+        results = [connection.recv() for connection in self._connections]
+        return np.concatenate([observations for observations, _ in results]), results[0][1]
+
+    def step(self, actions):
+        """
+        Method to advance every lander by one timestep, as VectorLanderEnv.step
+        """
+        for connection, worker_actions in zip(self._connections, np.split(np.asarray(actions), self._splits)):
+            connection.send(("step", worker_actions))
+        results = [connection.recv() for connection in self._connections]
+
+        observations, rewards, terminated, truncated, infos = zip(*results)
+        info = {key: np.concatenate([worker_info[key] for worker_info in infos]) for key in infos[0]}
+        return (np.concatenate(observations), np.concatenate(rewards), np.concatenate(terminated),
+                np.concatenate(truncated), info)
+
+    def _split(self, values):
+        # Split per-lander arrays between the workers, passing single values to every worker
+        if values is None or np.ndim(values) < 2:
+            return [values] * len(self.sizes)
+        return np.split(np.asarray(values), self._splits)
+
+    def close(self):
+        for connection in self._connections:
+            try:
+                connection.send(("close", None))
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join()
+        self._connections = []
+        self._processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _worker(connection, n, seed, kwargs):
+    """
+    Function run by each SubprocVectorLanderEnv worker process, applying the commands it is sent to its environment
+    """
+    env = VectorLanderEnv(n, seed, **kwargs)
+    while True:
+        command, data = connection.recv()
+        if command == "reset":
+            connection.send(env.reset(*data))
+        elif command == "step":
+            connection.send(env.step(data))
+        elif command == "close":
+            break
+    connection.close()
@@ -0,0 +1,51 @@
+"""
+Helpers for the files the game keeps on disk
+Finds the per-user cache directory and writes files so that readers, including other processes, only ever see the old
+file or the complete new one. The caches only save time, so their callers treat a failed write as a cache miss.
+"""
+import contextlib
+import os
+import threading
+
+CACHE_ROOT = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                          "moon_lander")
+
+
+def cache_path(*names):
+    """
+    Function to return the path of a file or directory in the game's cache directory
+    :param names: path components below the cache directory
+    """
+    return os.path.join(CACHE_ROOT, *names)
+
+
+@contextlib.contextmanager
+def replacing(path, suffix=".tmp"):
+    """
+    Context manager yielding the path of a temporary file next to path to write to, which is moved over path in one
+    step when the block finishes, or deleted if the block raises
+    :param path: file to replace
+    :param suffix: suffix of the temporary file's name
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    # Named for the process and thread writing it, so concurrent writers of the same file do not share a temporary file
+    temp_path = "{}.{}.{}{}".format(path, os.getpid(), threading.get_ident(), suffix)
+    try:
+        yield temp_path
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+
+
+@contextlib.contextmanager
+def write_atomic(path, mode="w"):
+    """
+    Context manager yielding a file opened with mode, whose contents replace path in one step when the block finishes
+    :param path: file to replace
+    :param mode: "w" for text or "wb" for binary
+    """
+    with replacing(path) as temp_path:
+        with open(temp_path, mode) as temp_file:
+            yield temp_file
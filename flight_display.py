@@ -25,19 +25,123 @@ class ScaleDisplay:
             self.display_value = new_value / (self.scale_range[1]-self.scale_range[0])
 
     def draw(self):
+        # Positions are in the game's layout coordinates, converted to the resolution the game is drawn at
+        to_screen = self.game.to_screen
+        width = self.game.scaled(5)
+
         # Draw main scale line
-        pygame.draw.line(self.game.screen, (255, 255, 255), self.low_end, self.high_end, 5)
+        pygame.draw.line(self.game.screen, (255, 255, 255), to_screen(self.low_end), to_screen(self.high_end), width)
 
         # Draw line ends
-        pygame.draw.line(self.game.screen, (255, 255, 255), (self.low_end[0] - 10, self.low_end[1]),
-                         (self.low_end[0] + 10, self.low_end[1]), 5)
-        pygame.draw.line(self.game.screen, (255, 255, 255), (self.high_end[0] - 10, self.high_end[1]),
-                         (self.high_end[0] + 10, self.high_end[1]), 5)
+        pygame.draw.line(self.game.screen, (255, 255, 255), to_screen((self.low_end[0] - 10, self.low_end[1])),
+                         to_screen((self.low_end[0] + 10, self.low_end[1])), width)
+        pygame.draw.line(self.game.screen, (255, 255, 255), to_screen((self.high_end[0] - 10, self.high_end[1])),
+                         to_screen((self.high_end[0] + 10, self.high_end[1])), width)
         if self.middle_tick:
-            pygame.draw.line(self.game.screen, (255, 255, 255), (self.high_end[0] - 10, self.high_end[1]),
-                             (self.high_end[0] + 10, self.high_end[1]), 5)
+            pygame.draw.line(self.game.screen, (255, 255, 255), to_screen((self.high_end[0] - 10, self.high_end[1])),
+                             to_screen((self.high_end[0] + 10, self.high_end[1])), width)
 
         # Draw value on scale
         display_pos = (self.low_end[0]-self.display_value*(self.low_end[0]-self.high_end[0]),
                        self.low_end[1]-self.display_value*(self.low_end[1]-self.high_end[1]))
-        pygame.draw.circle(self.game.screen, (255, 0, 0), display_pos, 5)
+        pygame.draw.circle(self.game.screen, (255, 0, 0), to_screen(display_pos), self.game.scaled(5))
+
+
+class StripChart:
+    """
+    Class to implement a scrolling chart of the latest telemetry, shown during the flight
+
+    The chart is kept on its own surface, which is scrolled left as time passes so that only the newest segment of each
+    series has to be drawn each frame. The cost of a frame is the same however long the flight has been going.
+    The surface is drawn at the resolution the game is rendered at, and the chart so far is rescaled when that changes.
+    """
+    background = (0, 0, 0, 155)
+
+    def __init__(self, game, position, dims, scale_ranges, colours=((255, 255, 255),), window=10000):
+        """
+        :param game:
+        :param position: position of the top left corner of the chart, in the game's layout coordinates
+        :param dims: (width, height) of the chart, in the game's layout coordinates
+        :param scale_ranges: (low, high) range of each series, values outside it are clamped to the chart
+        :param colours: colour of each series
+        :param window: length of time shown across the chart, in the same units as the time passed to update
+        """
+        self.game = game
+        self.position = position
+        self.dims = dims
+        self.scale_ranges = scale_ranges
+        self.colours = colours
+        self.window = window
+
+        self.surface = pygame.Surface(self._pixel_dims(), flags=pygame.SRCALPHA)
+        self.pixels_per_time = self.surface.get_width() / window
+        self.clear()
+
+    def _pixel_dims(self):
+        return round(self.dims[0] * self.game.scale[0]), round(self.dims[1] * self.game.scale[1])
+
+    def _check_size(self):
+        """
+        Method to rescale the chart drawn so far if the resolution the game is drawn at has changed
+        """
+        dims = self._pixel_dims()
+        old_dims = self.surface.get_size()
+        if dims == old_dims:
+            return
+        self.surface = pygame.transform.smoothscale(self.surface, dims)
+        self.pixels_per_time = dims[0] / self.window
+        self._scroll = 0.0
+        if self._last_points is not None:
+            self._last_points = [2 + (y - 2) * (dims[1] - 5) / (old_dims[1] - 5) for y in self._last_points]
+
+    def clear(self):
+        """
+        Method to empty the chart, ready for a new flight
+        """
+        self.surface.fill(self.background)
+        self._last_time = None
+        self._last_points = None
+        self._scroll = 0.0
+
+    def update(self, time, values):
+        """
+        Method to add the latest value of each series to the chart
+        :param time:
+        :param values: value of each series, in the same order as scale_ranges
+        """
+        self._check_size()
+        width, height = self.surface.get_size()
+        points = []
+        for value, (low, high) in zip(values, self.scale_ranges):
+            fraction = min(max((value - low) / (high - low), 0), 1)
+            # Keep the lines clear of the border drawn around the chart
+            points.append(2 + (height - 5) * (1 - fraction))
+
+        if self._last_time is None or time < self._last_time:
+            self.clear()
+            self._last_time = time
+            self._last_points = points
+            return
+
+        # Scroll by the whole number of pixels that have passed, carrying the remainder on to the next update
+        self._scroll += (time - self._last_time) * self.pixels_per_time
+        shift = int(self._scroll)
+        self._scroll -= shift
+        self._last_time = time
+        if shift >= width:
+            self.surface.fill(self.background)
+        elif shift > 0:
+            self.surface.scroll(-shift, 0)
+            self.surface.fill(self.background, (width - shift, 0, shift, height))
+
+        # Draw only the newest segment of each series
+        for i, (last_y, y) in enumerate(zip(self._last_points, points)):
+            pygame.draw.line(self.surface, self.colours[i % len(self.colours)], (width - 1 - shift, last_y),
+                             (width - 1, y), 2)
+        self._last_points = points
+
+    def draw(self):
+        self._check_size()
+        position = self.game.to_screen(self.position)
+        self.game.screen.blit(self.surface, position)
+        pygame.draw.rect(self.game.screen, (255, 255, 255), (position, self.surface.get_size()), self.game.scaled(2))
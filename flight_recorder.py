@@ -0,0 +1,131 @@
+"""
+Flight recorder for Moon Lander flights
+Streams fixed-width binary records of the lander's state and control inputs to a file through a buffer, and reads
+recordings back by memory-mapping them as a numpy structured array.
+
+File layout:
+    magic b"MLFR", format version (uint16), header length (uint32)
+    header: JSON object with the record dtype and the flight's metadata, padded with spaces to a multiple of 64 bytes
+    records: packed records of RECORD_DTYPE until the end of the file
+"""
+import json
+import struct
+
+import numpy as np
+
+MAGIC = b"MLFR"
+# Version 2 added the timestep of each step and recorded the state at full precision
+VERSION = 2
+PREAMBLE = struct.Struct("<4sHI")
+
+# The state is recorded at full precision so that replays can be checked against it exactly. Each record is the state
+# at the start of a step, with the timestep and inputs used for that step
+RECORD_DTYPE = np.dtype([("time", "<f8"),
+                         ("dt", "<f8"),
+                         ("x", "<f8"),
+                         ("y", "<f8"),
+                         ("vx", "<f8"),
+                         ("vy", "<f8"),
+                         ("angle", "<f8"),
+                         ("throttle", "<f4"),
+                         ("fuel", "<f4"),
+                         ("inputs", "u1")])
+
+# Bits of the inputs field
+FORWARD = 1
+LEFT = 2
+RIGHT = 4
+
+
+class FlightRecorder:
+    """
+    Class to write a flight to a recording file
+    Records are collected in a preallocated buffer and written to the file in blocks of buffer_size records.
+    """
+
+    def __init__(self, path, metadata=None, buffer_size: int = 1024):
+        """
+        :param path: path of the recording file, which must not already exist
+        :param metadata: optional dictionary describing the flight, stored in the header
+        :param buffer_size: number of records written to the file at a time
+        """
+        self.path = path
+        self._file = open(path, "xb")
+        self._buffer = np.zeros(buffer_size, dtype=RECORD_DTYPE)
+        self._count = 0
+
+        header = json.dumps({"dtype": RECORD_DTYPE.descr, "metadata": metadata or {}}).encode()
+        header += b" " * (-(PREAMBLE.size + len(header)) % 64)
+        self._file.write(PREAMBLE.pack(MAGIC, VERSION, len(header)))
+        self._file.write(header)
+        self._file.flush()
+
+    def record(self, time, dt, lander, forward=False, left=False, right=False):
+        """
+        Method to record the state of a lander and the timestep and control inputs it is about to be stepped with
+        :param time:
+        :param dt:
+        :param lander: physics.Lander (or anything with the same attributes)
+        :param forward:
+        :param left:
+        :param right:
+        """
+        inputs = (FORWARD if forward else 0) | (LEFT if left else 0) | (RIGHT if right else 0)
+        self._buffer[self._count] = (time, dt, lander.position.x, lander.position.y, lander.velocity.x,
+                                     lander.velocity.y, lander.angle, lander.throttle, lander.fuel, inputs)
+        self._count += 1
+        if self._count == len(self._buffer):
+            self.flush()
+
+    def flush(self):
+        """
+        Method to write the buffered records to the file
+        """
+        if self._count:
+            self._file.write(self._buffer[:self._count].tobytes())
+            self._count = 0
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_recording(path):
+    """
+    Function to open a recording without parsing its records
+    :param path:
+    :return metadata, records: the flight's metadata and a read-only memory-mapped array of its records
+    """
+    with open(path, "rb") as recording:
+        preamble = recording.read(PREAMBLE.size)
+        if len(preamble) < PREAMBLE.size:
+            raise ValueError("{} is not a flight recording".format(path))
+        magic, version, header_length = PREAMBLE.unpack(preamble)
+        if magic != MAGIC:
+            raise ValueError("{} is not a flight recording".format(path))
+        if version != VERSION:
+            raise ValueError("{} has unsupported recording version {}".format(path, version))
+        header = json.loads(recording.read(header_length))
+        size = recording.seek(0, 2)
+
+    dtype = np.dtype([tuple(field) for field in header["dtype"]])
+    offset = PREAMBLE.size + header_length
+    num_records = (size - offset) // dtype.itemsize
+    if num_records == 0:
+        return header["metadata"], np.zeros(0, dtype=dtype)
+    return header["metadata"], np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(num_records,))
+
+
+def unpack_inputs(inputs):
+    """
+    Function to split an inputs field (or array of them) into forward, left and right flags
+    """
+    return (inputs & FORWARD) != 0, (inputs & LEFT) != 0, (inputs & RIGHT) != 0
@@ -0,0 +1,80 @@
+"""
+Cache of resolved system fonts
+pygame.font.SysFont scans every font installed on the system the first time it is called in a process, which is slow on
+machines with many fonts. The font file each name resolves to is stored on disk, so later launches open the file
+directly without scanning, and each (name, size) font is only created once per process.
+"""
+import json
+import os
+
+import pygame
+
+import file_store
+
+DEFAULT_CACHE_PATH = file_store.cache_path("fonts.json")
+
+_fonts = {}
+_paths = None
+
+
+def get_font(name, size, cache_path=DEFAULT_CACHE_PATH):
+    """
+    Function to return a font in the same way as pygame.font.SysFont(name, size), using the cached path of the font file
+    :param name: system font name
+    :param size:
+    :param cache_path: file the resolved font paths are stored in, or None to not store them
+    :return font:
+    """
+    font = _fonts.get((name, size))
+    if font is None:
+        font = pygame.font.Font(font_path(name, cache_path), size)
+        _fonts[(name, size)] = font
+    return font
+
+
+def font_path(name, cache_path=DEFAULT_CACHE_PATH):
+    """
+    Function to return the path of the font file a system font name resolves to, or None for pygame's default font
+    Only a cached path that no longer exists (for example after the font was uninstalled) causes a new scan.
+    """
+    global _paths
+    if _paths is None:
+        _paths = _read(cache_path)
+
+    key = name.lower()
+    if key in _paths and (_paths[key] is None or os.path.exists(_paths[key])):
+        return _paths[key]
+
+    _paths[key] = pygame.font.match_font(name)
+    _write(cache_path, _paths)
+    return _paths[key]
+
+
+def clear():
+    """
+    Function to forget the fonts created and the paths read in this process
+    """
+    global _paths
+    _fonts.clear()
+    _paths = None
+
+
+def _read(cache_path):
+    if cache_path is None:
+        return {}
+    try:
+        with open(cache_path) as cache_file:
+            paths = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    return paths if isinstance(paths, dict) else {}
+
+
+def _write(cache_path, paths):
+    if cache_path is None:
+        return
+    try:
+        with file_store.write_atomic(cache_path) as cache_file:
+            json.dump(paths, cache_file)
+    except OSError:
+        pass
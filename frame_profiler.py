@@ -0,0 +1,157 @@
+"""
+Per-phase frame profiler
+Times each phase of a frame with a single perf_counter call per phase, keeping the latest frames in a preallocated
+buffer, so it is cheap enough to leave running in production. The percentiles of each phase can be shown on screen and
+the buffered frames written to a CSV file to find where frame-time spikes come from.
+"""
+import time
+
+import numpy as np
+
+import flight_display as fd
+import font_cache
+import text_cache
+
+
+class FrameProfiler:
+    """
+    Class to time the phases of each frame
+
+    Call start_frame at the start of a frame, mark(phase) at the end of each phase and end_frame once the frame is done.
+    Time between marks is added to the phase marked, so a phase can be marked more than once in a frame.
+    """
+
+    def __init__(self, phases, capacity: int = 600):
+        """
+        :param phases: names of the phases of a frame, in the order they happen
+        :param capacity: number of frames kept
+        """
+        self.phases = tuple(phases)
+        self.capacity = capacity
+        self._phase_index = {phase: i for i, phase in enumerate(self.phases)}
+
+        # One row per frame of the time spent in each phase, in seconds
+        self._frames = np.zeros((capacity, len(self.phases)))
+        self._current = [0.0] * len(self.phases)
+        self._count = 0
+        self._last = None
+
+    def start_frame(self):
+        self._current = [0.0] * len(self.phases)
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        """
+        Method to end the named phase, adding the time since the last mark to it
+        """
+        now = time.perf_counter()
+        if self._last is not None:
+            self._current[self._phase_index[phase]] += now - self._last
+        self._last = now
+
+    def end_frame(self):
+        if self._last is None:
+            return
+        self._frames[self._count % self.capacity] = self._current
+        self._count += 1
+        self._last = None
+
+    def frames(self):
+        """
+        Method to return the time spent in each phase of the buffered frames, oldest first
+        :return frames: array of shape (frames, phases) in seconds
+        """
+        if self._count <= self.capacity:
+            return self._frames[:self._count]
+        start = self._count % self.capacity
+        return np.concatenate((self._frames[start:], self._frames[:start]))
+
+    def percentiles(self, q=(50, 95, 99)):
+        """
+        Method to return percentiles of the time spent in each phase, and in the whole frame, over the buffered frames
+        :param q: percentiles to find
+        :return percentiles: dictionary of phase name (and "frame") to a tuple of times in seconds, one per percentile
+        """
+        frames = self.frames()
+        if len(frames) == 0:
+            return {}
+        phase_times = np.percentile(frames, q, axis=0)
+        frame_times = np.percentile(frames.sum(axis=1), q)
+        result = {phase: tuple(phase_times[:, i].tolist()) for i, phase in enumerate(self.phases)}
+        result["frame"] = tuple(frame_times.tolist())
+        return result
+
+    def dump(self, path):
+        """
+        Method to write the buffered frames to a CSV file, with one column per phase in milliseconds
+        """
+        frames = self.frames() * 1000
+        total = frames.sum(axis=1, keepdims=True)
+        np.savetxt(path, np.hstack((frames, total)), fmt="%.4f", delimiter=",",
+                   header=",".join(self.phases + ("frame",)), comments="")
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+
+class ProfilerOverlay:
+    """
+    Class to show a profiler's phase percentiles and a scrolling graph of frame times on screen
+    The percentiles are only recalculated every refresh_interval frames, which keeps the overlay cheap and readable.
+    """
+
+    def __init__(self, game, profiler, font_size: int = 18, position=(100, 380), refresh_interval: int = 30):
+        """
+        :param game:
+        :param profiler: FrameProfiler to show
+        :param font_size: size of the text of the table of percentiles
+        :param position: top left corner of the overlay, in the game's layout coordinates
+        :param refresh_interval: number of frames between recalculating the percentiles
+        """
+        self.game = game
+        self.profiler = profiler
+        self.font_size = font_size
+        self.position = position
+        self.refresh_interval = refresh_interval
+        self.visible = False
+
+        self.line_height = font_cache.get_font("Helvetica", font_size).get_linesize()
+        chart_position = (position[0], position[1] + self.line_height * (len(profiler.phases) + 2) + 5)
+        self.chart = fd.StripChart(game, chart_position, (360, 60), ((0, 50),), ((255, 255, 0),), window=5000)
+        self._rows = []
+        self._frames = 0
+        self._time = 0
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def update(self, frame_time):
+        """
+        Method to add the latest frame to the overlay
+        :param frame_time: length of the last frame in milliseconds
+        """
+        self._time += frame_time
+        self.chart.update(self._time, (frame_time,))
+
+        self._frames += 1
+        if self._frames >= self.refresh_interval:
+            self._frames = 0
+            self._rows = [("ms", "p50", "p95", "p99")]
+            for phase, times in self.profiler.percentiles().items():
+                self._rows.append((phase,) + tuple(text_cache.format_value(t * 1000, 2) for t in times))
+
+    def draw(self):
+        if not self.visible:
+            return
+        # The text is rendered at the resolution the game is drawn at
+        font = font_cache.get_font("Helvetica", self.game.scaled(self.font_size))
+        x, y = self.position
+        for row in self._rows:
+            # Phase names take the first, wider column
+            column_x = x
+            for i, cell in enumerate(row):
+                self.game.screen.blit(self.game.text.render(font, cell, (255, 255, 0)),
+                                      self.game.to_screen((column_x, y)))
+                column_x += 120 if i == 0 else 80
+            y += self.line_height
+        self.chart.draw()
@@ -1,11 +1,21 @@
 """
 Takes in a filepath to a texture image and a dictionary of image names, and corner coordinates.
 Returns a dictionary of pygame surfaces for each sprite.
+Sprites are stored in a precompiled cache file after the first launch, so later launches load them in one read without
+decoding the texture image. Also keeps a cache of sprite images that have been scaled and rotated for drawing.
 """
+import json
+import os
+from collections import OrderedDict
+
 import pygame
 
+import file_store
+
+DEFAULT_CACHE_DIR = file_store.cache_path("sprites")
 
-def get_textures(image_path, image_index):
+
+def get_textures(image_path, image_index, cache_dir=DEFAULT_CACHE_DIR):
     """
     Function to take in the overall texture image and split it into images for each sprite according to the image index.
 
@@ -16,8 +26,26 @@ def get_textures(image_path, image_index):
     Image index takes the form {"sprite_name":((corner_1x, corner_1y), (corner_2x, corner_2y))}
     :param image_path:
     :param image_index:
+    :param cache_dir: directory the precompiled sprites are stored in, or None to always split the texture image
     :return sprites:
     """
+    if cache_dir is None:
+        return _split_textures(image_path, image_index)
+
+    # The cache is only used if it was built from the same texture image and index
+    stat = os.stat(image_path)
+    key = {"image": os.path.abspath(image_path), "mtime": stat.st_mtime_ns, "size": stat.st_size,
+           "index": {name: [list(corner) for corner in corners] for name, corners in image_index.items()}}
+    cache_path = os.path.join(cache_dir, os.path.splitext(os.path.basename(image_path))[0] + ".sprites")
+
+    sprites = _read_cache(cache_path, key)
+    if sprites is None:
+        sprites = _split_textures(image_path, image_index)
+        _write_cache(cache_path, key, sprites)
+    return sprites
+
+
+def _split_textures(image_path, image_index):
     full_image = pygame.image.load(image_path)
     full_image = full_image.convert_alpha(full_image)
     sprites = {}
@@ -37,3 +65,89 @@ def get_textures(image_path, image_index):
         sprites[sprite] = sprite_image
 
     return sprites
+
+
+def _read_cache(cache_path, key):
+    """
+    Function to load sprites from a cache file written by _write_cache, which holds a line of JSON giving the key and
+    the name and size of each sprite, followed by the RGBA pixels of every sprite
+    :return sprites: dictionary of sprite surfaces, or None if the cache is missing or was built from another image
+    """
+    try:
+        with open(cache_path, "rb") as cache_file:
+            data = cache_file.read()
+        header_end = data.index(b"\n")
+        header = json.loads(data[:header_end])
+    except (OSError, ValueError):
+        return None
+    if header.get("key") != key:
+        return None
+
+    sprites = {}
+    offset = header_end + 1
+    for name, width, height in header["sprites"]:
+        length = width * height * 4
+        if offset + length > len(data):
+            return None
+        sprite_image = pygame.image.frombuffer(data[offset:offset + length], (width, height), "RGBA")
+        sprites[name] = sprite_image.convert_alpha(sprite_image)
+        offset += length
+    return sprites
+
+
+def _write_cache(cache_path, key, sprites):
+    header = {"key": key, "sprites": [[name, *image.get_size()] for name, image in sprites.items()]}
+    try:
+        with file_store.write_atomic(cache_path, "wb") as cache_file:
+            cache_file.write(json.dumps(header).encode() + b"\n")
+            for image in sprites.values():
+                cache_file.write(pygame.image.tobytes(image, "RGBA"))
+    except OSError:
+        pass
+
+
+class RotationCache:
+    """
+    Class to keep sprite images scaled and rotated to angles rounded to angle_step, so that drawing a sprite is a lookup
+    and a blit rather than a scale and rotate every frame. At most max_size images are kept, dropping the least recently
+    used.
+    """
+
+    def __init__(self, angle_step=1.0, max_size: int = 256):
+        """
+        :param angle_step: angular resolution of the cached images in degrees
+        :param max_size: number of rotated images kept
+        """
+        self.angle_step = angle_step
+        self.num_angles = round(360 / angle_step)
+        self.max_size = max_size
+        self._images = OrderedDict()
+
+    def get(self, image, size, angle):
+        """
+        Method to return image scaled to size and rotated anticlockwise by angle (in degrees, rounded to angle_step)
+        :param image:
+        :param size: (width, height) to scale the image to before rotating
+        :param angle:
+        :return rotated_image:
+        """
+        step = round(angle / self.angle_step) % self.num_angles
+        key = (image, size, step)
+        rotated_image = self._images.get(key)
+        if rotated_image is not None:
+            self._images.move_to_end(key)
+            return rotated_image
+
+        rotated_image = pygame.transform.rotate(pygame.transform.scale(image, size), step * self.angle_step)
+        self._images[key] = rotated_image
+        if len(self._images) > self.max_size:
+            self._images.popitem(last=False)
+        return rotated_image
+
+    def prerender(self, images, size):
+        """
+        Method to render every angle of each image in images at size ahead of time (limited by max_size)
+        """
+        for image in images:
+            for step in range(self.num_angles):
+                self.get(image, size, step * self.angle_step)
@@ -0,0 +1,135 @@
+"""
+Numerical integrators for the Moon Lander physics
+Each integrator advances a position (x, y) and velocity (vx, vy) by a timestep dt, given a function
+acceleration(x, y, vx, vy, t) that returns the acceleration (ax, ay) at time t into the step. Only arithmetic is used on
+the state, so the same integrators work on floats for a single body and on numpy arrays for a batch of bodies.
+"""
+import numpy as np
+
+
+def euler(x, y, vx, vy, acceleration, dt):
+    """
+    Explicit Euler: first order, moving the position with the velocity from the start of the step
+    """
+    ax, ay = acceleration(x, y, vx, vy, 0)
+    return x + vx*dt, y + vy*dt, vx + ax*dt, vy + ay*dt
+
+
+def semi_implicit_euler(x, y, vx, vy, acceleration, dt):
+    """
+    Semi-implicit (symplectic) Euler: first order, updating the velocity first and moving the position with it.
+    This is the integrator the game has always used.
+    """
+    ax, ay = acceleration(x, y, vx, vy, 0)
+    vx = vx + ax*dt
+    vy = vy + ay*dt
+    return x + vx*dt, y + vy*dt, vx, vy
+
+
+def velocity_verlet(x, y, vx, vy, acceleration, dt):
+    """
+    Velocity Verlet: second order, exact for constant acceleration
+    """
+    ax, ay = acceleration(x, y, vx, vy, 0)
+    x2 = x + vx*dt + 0.5*ax*dt*dt
+    y2 = y + vy*dt + 0.5*ay*dt*dt
+    ax2, ay2 = acceleration(x2, y2, vx + ax*dt, vy + ay*dt, dt)
+    return x2, y2, vx + 0.5*(ax + ax2)*dt, vy + 0.5*(ay + ay2)*dt
+
+
+def rk4(x, y, vx, vy, acceleration, dt):
+    """
+    Classic fourth order Runge-Kutta
+    """
+    return _rk4(x, y, vx, vy, acceleration, 0, dt)
+
+
+def _rk4(x, y, vx, vy, acceleration, t, h):
+    """
+    Function to take one RK4 step of length h starting from time t into the frame's step
+    """
+    ax1, ay1 = acceleration(x, y, vx, vy, t)
+
+    vx2, vy2 = vx + 0.5*h*ax1, vy + 0.5*h*ay1
+    ax2, ay2 = acceleration(x + 0.5*h*vx, y + 0.5*h*vy, vx2, vy2, t + 0.5*h)
+
+    vx3, vy3 = vx + 0.5*h*ax2, vy + 0.5*h*ay2
+    ax3, ay3 = acceleration(x + 0.5*h*vx2, y + 0.5*h*vy2, vx3, vy3, t + 0.5*h)
+
+    vx4, vy4 = vx + h*ax3, vy + h*ay3
+    ax4, ay4 = acceleration(x + h*vx3, y + h*vy3, vx4, vy4, t + h)
+
+    return (x + h*(vx + 2*vx2 + 2*vx3 + vx4)/6,
+            y + h*(vy + 2*vy2 + 2*vy3 + vy4)/6,
+            vx + h*(ax1 + 2*ax2 + 2*ax3 + ax4)/6,
+            vy + h*(ay1 + 2*ay2 + 2*ay3 + ay4)/6)
+
+
+class AdaptiveRK4:
+    """
+    Class to integrate with RK4 using step doubling to choose the substep size
+
+    Each substep is taken both as one RK4 step and as two half steps; the difference between them estimates the error,
+    which is kept below tolerance by shrinking or growing the substep. The substep size is remembered between calls, so
+    each body (or batch) should have its own AdaptiveRK4.
+    """
+
+    def __init__(self, tolerance=1e-3, min_step=1e-4):
+        """
+        :param tolerance: largest position error allowed per substep
+        :param min_step: smallest substep taken, whatever the error
+        """
+        self.tolerance = tolerance
+        self.min_step = min_step
+        self.step_size = None
+
+    def __call__(self, x, y, vx, vy, acceleration, dt):
+        t = 0
+        proposal = dt if self.step_size is None else self.step_size
+        while dt - t > 1e-12*dt:
+            # The last substep may be cut short to finish at dt, which should not shrink the next proposal
+            h = min(proposal, dt - t)
+            x1, y1, _, _ = _rk4(x, y, vx, vy, acceleration, t, h)
+            half = _rk4(x, y, vx, vy, acceleration, t, 0.5*h)
+            x2, y2, vx2, vy2 = _rk4(*half, acceleration, t + 0.5*h, 0.5*h)
+
+            error = max(_max_abs(x2 - x1), _max_abs(y2 - y1))
+            factor = 2 if error == 0 else min(2, 0.9*(self.tolerance/error)**0.2)
+            if error <= self.tolerance or h <= self.min_step:
+                x, y, vx, vy = x2, y2, vx2, vy2
+                t += h
+                proposal = max(proposal, h*factor) if h < proposal else h*factor
+            else:
+                proposal = max(self.min_step, h*max(0.2, factor))
+
+        self.step_size = proposal
+        return x, y, vx, vy
+
+
+def _max_abs(value):
+    """
+    Function to return the largest absolute value of a float or numpy array
+    """
+    if isinstance(value, np.ndarray):
+        return float(np.max(np.abs(value)))
+    return abs(value)
+
+
+INTEGRATORS = {
+    "euler": euler,
+    "semi_implicit_euler": semi_implicit_euler,
+    "velocity_verlet": velocity_verlet,
+    "rk4": rk4,
+    "adaptive_rk4": AdaptiveRK4,
+}
+
+
+def get(name):
+    """
+    Function to return the integrator with the given name, making a new instance for stateful integrators
+    """
+    try:
+        integrator = INTEGRATORS[name]
+    except KeyError:
+        raise ValueError("unknown integrator: {} (choose from {})".format(name, ", ".join(INTEGRATORS)))
+    return integrator() if isinstance(integrator, type) else integrator
@@ -1,54 +1,143 @@
+import math
 import pygame
-import perlin_noise
 import random
+from collections import OrderedDict
+
+import numpy as np
+
+import terrain
 
 
 class Moon:
-    def __init__(self, game):
+    def __init__(self, game, seed=None, chunk_size: int = 8192, max_chunks: int = 16, cache_dir=None):
         self.game = game
 
-        self.p = perlin_noise.PerlinNoise(octaves=3, seed=random.randint(0, 1000))
+        self.noise = terrain.TerrainNoise(octaves=3, seed=random.randint(0, 1000) if seed is None else seed)
+        self.terrain = terrain.ChunkedTerrain(self.noise, chunk_size, max_chunks, terrain.HeightMapCache(cache_dir))
+
+        # Distance either side of the lander that terrain is kept loaded for, generated in the background
+        self.load_margin = chunk_size
+        self.loader = terrain.TerrainLoader(self.terrain)
+        self._requested = None
 
-        self.height_map = []
-        self.display_points = []
+        # The terrain is drawn into strips (tiles) a fixed number of columns wide, each covering the full range of
+        # heights the terrain can reach, which are cached and blitted into place every frame
+        self.tile_width = 256
+        self.max_tiles = self.game.window_width // self.tile_width + 4
+        low, high = self.noise.height_bounds()
+        self.tile_top = high + 2
+        self.tile_height = round(high - low) + 4
+        self._tiles = OrderedDict()
+        self._tile_scale = None
 
+        # Height map index i is at world x coordinate i, so the screen starts half a screen left of x = 0
         self.display_offset = -round(self.game.window_width / 2)
         self.init_offset = self.display_offset
 
-    def load(self, n: int = 0, start_point: int = 0):
+    def load(self, progress=None):
         """
-        Method to generate the height map for the moon. Generates as many points as passed in by n and appends to the
-        height map to enable map to be generated in stages
-        :param n:
-        :param start_point:
+        Method to start loading the terrain around the lander's starting point in the background. The rest of the
+        terrain is loaded as the lander approaches it
+        :param progress: optional function called with (chunks loaded, total chunks) from the loading thread
         """
-        for i in range(n):
-            index = (i + start_point)*0.0005
-            perlin_val = 500*self.p(index)
-            height = 150 + perlin_val
-            self.height_map.append(height)
+        self.loader.request(*self.spawn_range(), progress)
 
-        self.display_offset += n//2
-        self.init_offset = self.display_offset
+    def spawn_range(self):
+        """
+        Method to return the range of samples that must be loaded before a flight can start
+        """
+        return (self.display_offset - self.load_margin,
+                self.display_offset + self.game.window_width + self.load_margin)
+
+    def ready(self):
+        """
+        Method to check whether the terrain around the starting point has been loaded
+        """
+        return self.loader.ready(*self.spawn_range())
+
+    def load_progress(self):
+        """
+        Method to return the fraction of the terrain around the starting point that has been loaded
+        """
+        loaded, total = self.loader.progress(*self.spawn_range())
+        return loaded / total
 
     def draw(self):
-        self.display_points = []
-        for i in range(self.game.window_width):
-            map_index = self.display_offset + i
-            if len(self.height_map)-1 > map_index > 0:
-                self.display_points.append((i, 720 - self.height_map[map_index] - self.game.rocket.display_height_delta))
-            else:
-                self.display_points.append((i, 720))
+        # Follow the view offset of the rocket as it was last placed on screen
+        self.display_offset = self.init_offset + round(self.game.rocket.display_pos_delta)
 
-        pygame.draw.lines(self.game.screen, (255, 255, 255), False, self.display_points)
+        # Tiles are drawn at the resolution the game is rendered at, so they are redrawn when it changes
+        scale = self.game.scale
+        if scale != self._tile_scale:
+            self._tiles.clear()
+            self._tile_scale = scale
+
+        # Strip row 0 is at height tile_top, so moving vertically just changes where the strips are blitted
+        y = (self.game.window_height - self.tile_top - self.game.rocket.display_height_delta) * scale[1]
+        first_tile = self.display_offset // self.tile_width
+        last_tile = (self.display_offset + self.game.window_width - 1) // self.tile_width
+
+        step = self.tile_width * scale[0]
+        x = (first_tile*self.tile_width - self.display_offset) * scale[0]
+        blit = self.game.screen.blit
+        for i in range(first_tile, last_tile + 1):
+            blit(self._get_tile(i), (x, y))
+            x += step
+
+    def _get_tile(self, tile_index):
+        """
+        Method to return the strip surface for a tile, drawing it if it is not already cached
+        :param tile_index:
+        :return tile:
+        """
+        tile = self._tiles.get(tile_index)
+        if tile is not None:
+            self._tiles.move_to_end(tile_index)
+            return tile
+
+        # Include the first point of the next tile so that the line joins up across tiles
+        heights = self.terrain.heights(tile_index*self.tile_width, self.tile_width + 1)
+        scale_x, scale_y = self.game.scale
+        points = np.column_stack((np.arange(len(heights)) * scale_x, (self.tile_top - heights) * scale_y)).tolist()
+
+        tile = pygame.Surface((math.ceil(self.tile_width * scale_x) + 1, math.ceil(self.tile_height * scale_y)))
+        tile.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+        pygame.draw.lines(tile, (255, 255, 255), False, points, max(1, round(scale_y)))
+
+        self._tiles[tile_index] = tile
+        while len(self._tiles) > self.max_tiles:
+            self._tiles.popitem(last=False)
+        return tile
 
     def update(self):
-        self.display_offset = self.init_offset + round(self.game.rocket.display_pos_delta)
+        # Queue the chunks the lander is approaching so they are loaded before they are needed, only asking again when
+        # the lander moves into another chunk
+        x = self.game.rocket.position.x
+        chunk = int(x) // self.terrain.chunk_size
+        if chunk != self._requested:
+            self._requested = chunk
+            self.loader.request(x - self.load_margin, x + self.load_margin)
+
+    def height_at(self, x):
+        """
+        Method to return the height of the ground at world x coordinate x, interpolated between height map samples
+        """
+        return self.terrain.interpolate(x)
 
-    def get_height(self, x):
-        index = round(x)
-        if 0 < index < len(self.display_points)-1:
-            ground_height = 720 - self.display_points[index][1] - self.game.rocket.display_height_delta
-        else:
-            ground_height = 0
-        return ground_height
+    def slope_at(self, x):
+        """
+        Method to return the gradient of the ground at world x coordinate x
+        """
+        return self.terrain.slope(x)
+
+    def normal_at(self, x):
+        """
+        Method to return the upward unit normal of the ground at world x coordinate x
+        """
+        return self.terrain.normal(x)
+
+    def collides(self, hull):
+        """
+        Method to check whether a hull, as returned by physics.Body.hull, touches the ground
+        """
+        return self.terrain.hull_collides(hull)
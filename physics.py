@@ -0,0 +1,259 @@
+"""
+This file defines the physics of the Moon Lander game, kept separate from pygame so that flights can be simulated
+without a display
+Body has the basic movement physics shared by all game objects, and Lander adds the engine, fuel and landing check
+"""
+
+import math
+import vector as v
+import integrators
+
+
+class Body:
+    """
+    Class to define the movement physics of an object in the game
+    Stores the object's position, velocity, angle and size and has methods to handle movement and collisions
+    """
+
+    def __init__(self, scale=(0, 0), init_pos=(0, 0), init_velocity=(0, 0), init_angular_velocity=0, init_angle=0,
+                 integrator="semi_implicit_euler"):
+        """
+        Constructor method for the body class.
+
+        :param scale: width and height of the body
+        :param init_pos:
+        :param init_velocity:
+        :param init_angular_velocity:
+        :param init_angle:
+        :param integrator: name of the integrator from integrators.INTEGRATORS used to move the body
+        """
+        self.scale = (scale[0], scale[1])
+        self.integrator = integrators.get(integrator)
+
+        # Initialise vectors for position, velocity and acceleration
+        self.position = v.vector2(init_pos[0], init_pos[1])
+        self.velocity = v.vector2(init_velocity[0], init_velocity[1])
+        self.acceleration = v.vector2()
+
+        # Initialise the angle and direction of the body
+        self.direction = v.vector2()  # A unit vector to represent the body's direction
+        self._angle = 0  # Angle in radians clockwise from the y-axis (0 is pointing straight up)
+        self.angle = init_angle
+        self.angular_velocity = init_angular_velocity  # Angular velocity in rad/s
+
+    def integrate(self, dt):
+        """
+        Method to move the body on by one timestep
+        Uses the body's integrator to calculate the updated position and velocity, and turns at the angular velocity
+        """
+        x, y, vx, vy = self.integrator(self.position.x, self.position.y, self.velocity.x, self.velocity.y,
+                                       self.acceleration_at, dt)
+        self.position = v.vector2(x, y)
+        self.velocity = v.vector2(vx, vy)
+
+        self.angle = self.angle + self.angular_velocity * dt
+
+    def acceleration_at(self, x, y, vx, vy, t):
+        """
+        Method to return the body's acceleration at the given state, t into the current timestep
+        A plain body keeps the same acceleration for the whole timestep
+        """
+        return self.acceleration.x, self.acceleration.y
+
+    def check_collision(self, other):
+        """
+        Method to check if the body has collided with another passed in as other.
+
+        :param other:
+        """
+        # Same test as against other.corners(), without building the corners
+        half_width = other.scale[0] / 2
+        half_height = other.scale[1] / 2
+        return (other.position.x - half_width < self.position.x < other.position.x + half_width and
+                other.position.y - half_height < self.position.y < other.position.y + half_height)
+
+    def corners(self):
+        """
+        Method to return a tuple of each of the body's corners.
+        Starts from the top left, going clockwise
+        :return corners:
+        """
+        c1 = (self.position.x - self.scale[0] / 2, self.position.y - self.scale[1] / 2)
+        c2 = (self.position.x + self.scale[0] / 2, self.position.y - self.scale[1] / 2)
+        c3 = (self.position.x + self.scale[0] / 2, self.position.y + self.scale[1] / 2)
+        c4 = (self.position.x - self.scale[0] / 2, self.position.y + self.scale[1] / 2)
+        corners = (c1, c2, c3, c4)
+        return corners
+
+    def aabb(self):
+        """
+        Method to return the axis-aligned box around the body's hull, for broad-phase collision detection (see
+        spatial_hash)
+        :return aabb: (left, bottom, right, top)
+        """
+        xs, ys = hull_corners(self.position.x, self.position.y, self.direction.x, self.direction.y,
+                              self.scale[0] / 2, self.scale[1] / 2)
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def hull(self):
+        """
+        Method to return the corners of the body's box turned to its angle, around the body's position
+        Starts from the top left, going clockwise
+        :return hull:
+        """
+        xs, ys = hull_corners(self.position.x, self.position.y, self.direction.x, self.direction.y,
+                              self.scale[0] / 2, self.scale[1] / 2)
+        return tuple(zip(xs, ys))
+
+    @property
+    def angle(self):
+        return self._angle
+
+    @angle.setter
+    def angle(self, new_angle):
+        self._angle = new_angle
+        self.direction = v.vector2(math.sin(new_angle), math.cos(new_angle))
+
+
+class Lander(Body):
+    """
+    Class to represent the physics of the lander: its engine, fuel and mass, and whether it lands safely
+    Child class of Body
+    """
+
+    crash_speed = 25  # Touchdown speeds above this are a crash
+
+    def __init__(self, start_pos=(0, 0), integrator="semi_implicit_euler"):
+        self.init_engine()
+        super().__init__((75, 75), start_pos, integrator=integrator)
+
+    def init_engine(self):
+        """
+        Method to set up the engine and fuel state of a new lander
+        """
+        self.height = 0
+
+        self.throttle = 0
+        self.fuel = 100
+        self.max_throttle = 50
+        self.m = 25
+        self.twr_max = self.max_throttle/self.m
+        self.twr = 0
+        self.g = 0
+
+        self.accelerating = False
+        self.rotating = 0
+
+    def reset(self, position, velocity):
+        """
+        Method to reset the lander's position on a new flight
+        """
+        self.position = v.vector2(position[0], position[1])
+        self.velocity = v.vector2(velocity[0], velocity[1])
+        self.acceleration = v.vector2()
+        self.angle = 0
+        self.height = 0
+
+        self.accelerating = False
+        self.rotating = 0
+
+        self.throttle = 0
+        self.fuel = 100
+        self.m = 10 + (15 * self.fuel/100)
+        self.twr_max = self.max_throttle / self.m
+        self.twr = 0
+
+    def step(self, dt, g, ground):
+        """
+        Method to move the lander on by one timestep. Sets the acceleration and angular velocity of the lander
+        depending on the control inputs and current state, then integrates.
+
+        :param dt: simulation timestep
+        :param g: gravitational acceleration
+        :param ground: terrain the lander is flying over, with interpolate(x) and hull_collides(hull) methods (such as
+                       terrain.ChunkedTerrain)
+        :return outcome: None while flying, otherwise "crash" or "safe" once the lander touches the ground
+        """
+        # Height of the bottom of the lander above the ground directly below it
+        self.height = self.position.y - self.scale[1] / 2 - ground.interpolate(self.position.x)
+
+        if ground.hull_collides(self.hull()):
+            outcome = self.landing_outcome()
+            self.acceleration = v.vector2()
+            self.velocity = v.vector2()
+            return outcome
+
+        self.g = g
+        self.acceleration = v.vector2(0, -g)
+
+        # Set angular velocity depending on whether the lander is turning left or right
+        if self.rotating == 1:
+            self.angular_velocity = -0.9
+        elif self.rotating == 2:
+            self.angular_velocity = 0.9
+        else:
+            self.angular_velocity = 0
+
+        d_throttle = 2.5
+        if self.fuel > 0:
+            if self.accelerating:
+                self.throttle += d_throttle * self.max_throttle * dt
+            else:
+                self.throttle -= d_throttle * self.max_throttle * dt
+            if self.throttle > self.max_throttle:
+                self.throttle = self.max_throttle
+            elif self.throttle < 0:
+                self.throttle = 0
+        else:
+            self.throttle = 0
+
+        self.twr = self.throttle / self.m
+        self.acceleration += (self.direction * self.twr)
+        self.fuel -= self.throttle * 0.015 * dt
+        self.m = 10 + (15 * self.fuel/100)
+        self.twr_max = self.max_throttle / self.m if self.fuel > 0 else 0
+
+        self.rotating = 0
+        self.accelerating = False
+        self.integrate(dt)
+        return None
+
+    def acceleration_at(self, x, y, vx, vy, t):
+        """
+        Method to return the lander's acceleration t into the current timestep
+        The engine's thrust turns with the lander as it rotates during the timestep
+        """
+        angle = self._angle + self.angular_velocity * t
+        return math.sin(angle) * self.twr, math.cos(angle) * self.twr - self.g
+
+    def landing_outcome(self):
+        """
+        Method called when the lander touches the ground to check whether it crashes
+        :return outcome: "crash" or "safe"
+        """
+        return "crash" if self.velocity.mag > self.crash_speed else "safe"
+
+    def move_forward(self):
+        self.accelerating = True
+
+    def turn_left(self):
+        self.rotating = 1
+
+    def turn_right(self):
+        self.rotating = 2
+
+
+def hull_corners(x, y, sin_angle, cos_angle, half_width, half_height):
+    """
+    Function to return the corners of a box centred on (x, y) and turned clockwise by an angle, starting from the top
+    left and going clockwise. Works on floats or on numpy arrays of boxes.
+    :return xs, ys: tuples of the x and y coordinates of the four corners
+    """
+    # The box's up direction is (sin, cos) and its right direction is (cos, -sin)
+    across_x = cos_angle * half_width
+    across_y = sin_angle * half_width
+    up_x = sin_angle * half_height
+    up_y = cos_angle * half_height
+    xs = (x - across_x + up_x, x + across_x + up_x, x + across_x - up_x, x - across_x - up_x)
+    ys = (y + across_y + up_y, y - across_y + up_y, y - across_y - up_y, y + across_y - up_y)
+    return xs, ys
@@ -1,50 +1,183 @@
 """
 Library to draw a graph onto a pygame screen
+Series are scaled to the axes with numpy and decimated to the width of the plot before drawing, so the time to draw a
+graph depends on its size in pixels rather than the number of points plotted.
 """
+import numpy as np
 import pygame
 
+import font_cache
 
-def line_graph(data, dims, axis_titles=(None, None), custom_margins=None):
-    margins = [10, 10, 10, 10] if custom_margins is None else custom_margins
-    graph = _draw_axes(dims, axis_titles, margins)
-
-    scale_max_x = max(data[0])
-    scale_max_y = max(data[1])
-    display_points = []
-
-    # Add points to graph (scaled to axes)
-    for i in range(len(data[0])):
-        display_points.append([margins[3]+round(((dims[0]-(margins[3]+margins[1]))*data[0][i])/scale_max_x, 2),
-                               dims[1]-margins[2]-round(((dims[1]-(margins[0]+margins[2]))*data[1][i])/scale_max_y, 2)])
-    pygame.draw.lines(graph, (255, 255, 255), False, display_points)
+COLOURS = ((255, 255, 255), (255, 170, 60), (90, 200, 255), (140, 255, 120))
 
-    # Return graph as a surface
-    return graph
+_frames = {}
 
 
-def multiline_graph(data, dims, axis_titles=(None, None), custom_margins=None):
-    margins = [10, 10, 10, 10] if custom_margins is None else custom_margins
-    graph = _draw_axes(dims, axis_titles, margins)
-
-    scale_max_x = max(data[0])
-    scale_max_y = max(data[1])
-    display_points = []
-
-    # Add points to graph (scaled to axes)
-    for i in range(len(data[0])):
-        display_points.append([margins[3]+round(((dims[0]-(margins[3]+margins[1]))*data[0][i])/scale_max_x, 2),
-                               dims[1]-margins[2]-round(((dims[1]-(margins[0]+margins[2]))*data[1][i])/scale_max_y, 2)])
-    pygame.draw.lines(graph, (255, 255, 255), False, display_points)
+def line_graph(data, dims, axis_titles=(None, None), custom_margins=None):
+    """
+    Function to draw a line graph of a single series
+    :param data: x and y values as [x, y]
+    :param dims: (width, height) of the graph
+    :param axis_titles: (x title, y title)
+    :param custom_margins: [top, right, bottom, left] margins around the axes
+    :return graph: surface with the graph drawn on it
+    """
+    return multiline_graph(data, dims, axis_titles, custom_margins)
+
+
+def multiline_graph(data, dims, axis_titles=(None, None), custom_margins=None, colours=COLOURS, labels=None,
+                    secondary=(), decimation="minmax"):
+    """
+    Function to draw several series against the same x values
+
+    Each series is scaled from 0 (or its lowest value if that is negative) to its highest value. Series on the primary
+    axis share a scale, as do series on the secondary axis, which is drawn on the right of the graph.
+
+    :param data: x values followed by the y values of each series, as [x, y1, y2, ...]
+    :param dims: (width, height) of the graph
+    :param axis_titles: (x title, y title) or (x title, y title, secondary y title)
+    :param custom_margins: [top, right, bottom, left] margins around the axes
+    :param colours: colour of each series
+    :param labels: optional name of each series, drawn as a key at the top of the graph
+    :param secondary: indices (into the y series) of the series plotted on the secondary axis
+    :param decimation: "minmax" or "lttb", the method used to reduce series longer than the plot is wide
+    :return graph: surface with the graph drawn on it
+    """
+    margins = [10, 10, 10, 10] if custom_margins is None else list(custom_margins)
+    graph = _draw_axes(dims, axis_titles, margins, bool(secondary))
+
+    x = np.asarray(data[0], dtype=np.float64)
+    series = [np.asarray(y, dtype=np.float64) for y in data[1:]]
+    if len(x) < 2:
+        return graph
+
+    left, right = margins[3], dims[0] - margins[1]
+    top, bottom = margins[0], dims[1] - margins[2]
+    x_low, x_high = _scale_range(x)
+    groups = ([i for i in range(len(series)) if i not in secondary], [i for i in range(len(series)) if i in secondary])
+
+    for group in groups:
+        if not group:
+            continue
+        y_low, y_high = _scale_range(np.concatenate([series[i] for i in group]))
+        for i in group:
+            # Scale the series into pixel coordinates, then reduce it to a few points per pixel column
+            px = left + (right - left) * (x - x_low) / (x_high - x_low)
+            py = bottom - (bottom - top) * (series[i] - y_low) / (y_high - y_low)
+            px, py = decimate(px, py, right - left, decimation)
+            pygame.draw.lines(graph, colours[i % len(colours)], False, np.column_stack((px, py)).tolist())
+
+    if labels is not None:
+        _draw_key(graph, labels, colours, (left + 15, top))
 
     # Return graph as a surface
     return graph
 
 
-def _draw_axes(dims, axis_titles=(None, None), margins=None):
+def decimate(x, y, width, method="minmax"):
+    """
+    Function to reduce a series to roughly the number of points that can be seen when it is drawn width pixels wide
+    Series that are already short enough are returned unchanged.
+    :param x: x values, in increasing order
+    :param y:
+    :param width: number of buckets (pixel columns) to reduce the series to
+    :param method: "minmax" keeps the first, lowest, highest and last point of each bucket, so every peak is drawn;
+                   "lttb" keeps the point of each bucket that makes the largest triangle with its neighbours
+    :return x, y:
+    """
+    width = max(int(width), 1)
+    if method == "minmax":
+        if len(x) <= 4 * width:
+            return x, y
+        return _minmax(x, y, width)
+    elif method == "lttb":
+        if len(x) <= width + 2:
+            return x, y
+        return _lttb(x, y, width)
+    raise ValueError("Unknown decimation method {}".format(method))
+
+
+def _minmax(x, y, width):
+    # Bucket each point by the pixel column it falls in
+    buckets = np.minimum(((x - x[0]) * (width / max(x[-1] - x[0], 1e-12))).astype(np.int64), width - 1)
+    starts = np.flatnonzero(np.diff(buckets, prepend=-1))
+    ends = np.append(starts[1:], len(x)) - 1
+
+    # Find each bucket's extremes, then the first point of the bucket equal to each of them
+    counts = ends - starts + 1
+    lows = _first_match(y, np.repeat(np.minimum.reduceat(y, starts), counts), starts)
+    highs = _first_match(y, np.repeat(np.maximum.reduceat(y, starts), counts), starts)
+
+    # Keep the first, lowest, highest and last point of each bucket, in the order they were logged
+    indices = np.stack((starts, np.minimum(lows, highs), np.maximum(lows, highs), ends), axis=1).ravel()
+    return x[indices], y[indices]
+
+
+def _first_match(values, targets, starts):
+    matches = np.flatnonzero(values == targets)
+    return matches[np.searchsorted(matches, starts)]
+
+
+def _lttb(x, y, width):
+    # Largest triangle three buckets: the first and last points are kept, and the points between are split into
+    # buckets, choosing from each the point making the largest triangle with the last point chosen and the mean of the
+    # next bucket
+    edges = np.linspace(1, len(x) - 1, width + 1).astype(np.int64)
+    indices = np.zeros(width + 2, dtype=np.int64)
+    indices[-1] = len(x) - 1
+
+    chosen = 0
+    for bucket in range(width):
+        start, stop = edges[bucket], edges[bucket + 1]
+        if bucket + 1 < width:
+            next_start, next_stop = stop, edges[bucket + 2]
+            next_x, next_y = x[next_start:next_stop].mean(), y[next_start:next_stop].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+
+        areas = np.abs((x[chosen] - next_x) * (y[start:stop] - y[chosen]) -
+                       (x[chosen] - x[start:stop]) * (next_y - y[chosen]))
+        chosen = start + int(np.argmax(areas))
+        indices[bucket + 1] = chosen
+
+    return x[indices], y[indices]
+
+
+def _scale_range(values):
+    """
+    Function to return the range an axis covers: from 0 (or the lowest value if that is negative) to the highest value
+    """
+    low = min(float(values.min()), 0.0)
+    high = float(values.max())
+    if high <= low:
+        high = low + 1
+    return low, high
+
+
+def _draw_key(surf, labels, colours, position):
+    font = font_cache.get_font("Helvetica", 20)
+    x, y = position
+    for i, label in enumerate(labels):
+        text = font.render(str(label), True, colours[i % len(colours)])
+        surf.blit(text, (x, y))
+        x += text.get_width() + 20
+
+
+def _draw_axes(dims, axis_titles=(None, None), margins=None, secondary=False):
+    """
+    Function to draw the background, axes and axis titles of a graph, adding the space taken by the titles to margins
+    The frame for each size and set of titles is only drawn once, and copied after that.
+    """
+    key = (tuple(dims), tuple(axis_titles), tuple(margins), secondary)
+    frame = _frames.get(key)
+    if frame is not None:
+        surf, margins[:] = frame
+        return surf.copy()
+
     surf = pygame.Surface(dims, flags=pygame.SRCALPHA)
     surf.fill((0, 0, 0, 155))
 
-    axis_font = pygame.font.SysFont("Helvetica", 20)
+    axis_font = font_cache.get_font("Helvetica", 20)
 
     if axis_titles[0] is not None:
         x_title = axis_font.render(str(axis_titles[0]), False, (255, 255, 255))
@@ -55,10 +188,19 @@ def _draw_axes(dims, axis_titles=(None, None), margins=None):
         y_title = pygame.transform.rotate(y_title, 90)
         surf.blit(y_title, (0, (dims[1]/2)-(y_title.get_height()/2)))
         margins[3] += y_title.get_width()
+    if secondary and len(axis_titles) > 2 and axis_titles[2] is not None:
+        y2_title = axis_font.render(str(axis_titles[2]), False, (255, 255, 255))
+        y2_title = pygame.transform.rotate(y2_title, -90)
+        surf.blit(y2_title, (dims[0] - y2_title.get_width(), (dims[1]/2)-(y2_title.get_height()/2)))
+        margins[1] += y2_title.get_width()
 
     # Draw axes
     pygame.draw.line(surf, (255, 255, 255), (margins[3], margins[0]), (margins[3], dims[1] - margins[2]), width=10)
     pygame.draw.line(surf, (255, 255, 255), (margins[3] - 4, dims[1] - margins[2]),
                      (dims[0] - margins[1], dims[1] - margins[2]), width=10)
+    if secondary:
+        pygame.draw.line(surf, (255, 255, 255), (dims[0] - margins[1], margins[0]),
+                         (dims[0] - margins[1], dims[1] - margins[2]), width=10)
 
-    return surf
+    _frames[key] = (surf, list(margins))
+    return surf.copy()
@@ -0,0 +1,97 @@
+"""
+Replay of recorded Moon Lander flights
+Re-runs a flight recording (see flight_recorder) from its terrain seed, starting state and the timestep and control
+inputs of every step. Headless replays step a simulation.Simulation as fast as possible and check the replayed state
+against the recorded one; rendered replays are shown by MoonLander at any playback rate.
+
+Example:
+    python replay.py recordings/*.mlfr
+    python replay.py --render --speed 4 recordings/flight-20261018-120000-000.mlfr
+"""
+import argparse
+import multiprocessing
+
+import flight_recorder
+import simulation
+
+
+class ReplayResult:
+    """
+    Class to hold the result of a headless replay
+    """
+
+    def __init__(self, path, outcome, steps, mismatch):
+        """
+        :param path: path of the recording
+        :param outcome: "crash", "safe" or None if the recording ends before touchdown
+        :param steps: number of steps replayed
+        :param mismatch: index of the first step whose replayed state differs from the recording, or None
+        """
+        self.path = path
+        self.outcome = outcome
+        self.steps = steps
+        self.mismatch = mismatch
+
+    def __repr__(self):
+        return "ReplayResult({!r}, {!r}, {}, {})".format(self.path, self.outcome, self.steps, self.mismatch)
+
+
+def replay(path, integrator="semi_implicit_euler"):
+    """
+    Function to replay a recording headlessly, checking the state at the start of every step against the recording
+    :param path: path of the recording
+    :param integrator: integrator to replay with, to see how a different integrator changes recorded flights
+    :return result: ReplayResult
+    """
+    metadata, records = flight_recorder.read_recording(path)
+    sim = simulation.Simulation(seed=metadata["seed"], g=metadata["g"], integrator=integrator)
+    sim.reset(metadata["position"], metadata["velocity"])
+    lander = sim.lander
+
+    columns = [records[name].tolist() for name in ("dt", "x", "y", "vx", "vy", "angle")]
+    inputs = [flags.tolist() for flags in flight_recorder.unpack_inputs(records["inputs"])]
+
+    mismatch = None
+    steps = 0
+    for dt, x, y, vx, vy, angle, forward, left, right in zip(*columns, *inputs):
+        if mismatch is None and (lander.position.x != x or lander.position.y != y or lander.velocity.x != vx
+                                 or lander.velocity.y != vy or lander.angle != angle):
+            mismatch = steps
+        steps += 1
+        if sim.step(dt, forward, left, right) is not None:
+            break
+
+    return ReplayResult(path, sim.outcome, steps, mismatch)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded Moon Lander flights")
+    parser.add_argument("recordings", nargs="+", help="flight recordings to replay")
+    parser.add_argument("--render", action="store_true", help="show the replay in the game instead of running headless")
+    parser.add_argument("--speed", type=float, default=1.0, help="playback rate of rendered replays")
+    parser.add_argument("--integrator", default="semi_implicit_euler", help="integrator for headless replays")
+    parser.add_argument("--processes", type=int, help="number of processes for headless replays")
+    args = parser.parse_args(argv)
+
+    if args.render:
+        import Moon_Lander
+        Moon_Lander.MoonLander(recording_dir=None, replay_path=args.recordings[0], replay_speed=args.speed)
+        return
+
+    with multiprocessing.Pool(args.processes) as pool:
+        results = pool.starmap(replay, [(path, args.integrator) for path in args.recordings])
+
+    mismatches = 0
+    for result in results:
+        if result.mismatch is None:
+            status = "ok"
+        else:
+            status = "DIVERGED at step {}".format(result.mismatch)
+            mismatches += 1
+        print("{}: {} after {} steps, {}".format(result.path, result.outcome, result.steps, status))
+    print("{} of {} recordings replayed exactly".format(len(results) - mismatches, len(results)))
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Dynamic resolution scaling
+Chooses the resolution the game is drawn at from how long recent frames took, lowering it when frames run over their
+time budget and raising it again once there is room, so that the frame rate holds on fast and slow machines alike.
+"""
+
+
+class DynamicResolution:
+    """
+    Class to pick a render scale, the fraction of the display's resolution that frames are drawn at
+
+    Frame times are averaged over sample_frames frames between adjustments. The scale is only raised if the frames would
+    still fit within headroom of the budget at the higher resolution, assuming their cost grows with the number of
+    pixels drawn, which stops it from going back and forth between two scales.
+    """
+
+    def __init__(self, budget, min_scale=0.5, max_scale=1.0, step=0.1, sample_frames: int = 30, headroom=0.8):
+        """
+        :param budget: time a frame may take to update and draw, in milliseconds
+        :param min_scale: lowest render scale
+        :param max_scale: highest render scale, which is also the starting scale
+        :param step: change in render scale at each adjustment
+        :param sample_frames: number of frames averaged before each adjustment
+        :param headroom: fraction of the budget frames must be expected to take at the higher scale before it is raised
+        """
+        self.budget = budget
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.step = step
+        self.sample_frames = sample_frames
+        self.headroom = headroom
+
+        self.scale = max_scale
+        self._total = 0.0
+        self._frames = 0
+
+    def update(self, frame_time):
+        """
+        Method to add the time taken by the last frame, adjusting the render scale if enough frames have been seen
+        :param frame_time: time taken to update and draw the frame in milliseconds, not counting any wait for the next
+                           frame to be due
+        :return changed: whether the render scale has changed
+        """
+        self._total += frame_time
+        self._frames += 1
+        if self._frames < self.sample_frames:
+            return False
+
+        mean = self._total / self._frames
+        self._total = 0.0
+        self._frames = 0
+
+        scale = self.scale
+        if mean > self.budget:
+            scale = max(self.min_scale, round(self.scale - self.step, 6))
+        elif self.scale < self.max_scale:
+            higher = min(self.max_scale, round(self.scale + self.step, 6))
+            if mean * (higher / self.scale) ** 2 < self.budget * self.headroom:
+                scale = higher
+
+        changed = scale != self.scale
+        self.scale = scale
+        return changed
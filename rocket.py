@@ -1,17 +1,17 @@
 """
 This file defines a Sprite class and Rocket class for use in the Moon Lander game
-Rocket is a subclass of Sprite, which allows other game objects to be made with the same basic movement physics
+Sprite adds drawing to the movement physics of physics.Body, which allows other game objects to be made with the same
+basic movement physics. Rocket draws a physics.Lander
 """
 
-import pygame
-import vector as v
+import physics
 import math
 
 
-class Sprite:
+class Sprite(physics.Body):
     """
     Class to define the general behaviour of sprites in the game
-    Stores the sprite's image and has methods to handle movement and collisions
+    Stores the sprite's image and draws it, with movement and collisions handled by physics.Body
     """
 
     def __init__(self, game, image, scale,
@@ -27,79 +27,53 @@ class Sprite:
         :param init_angular_velocity:
         """
         self.game = game
-        self.screen_dims = pygame.display.get_window_size()
-        self.scale = (scale[0], scale[1])
+        # The sprite is positioned in the game's layout coordinates, whatever resolution it is drawn at
+        self.screen_dims = (game.window_width, game.window_height)
 
         self.image = image
 
-        # Initialise vectors for position, velocity and acceleration
-        self.position = v.vector(init_pos[0], init_pos[1])
+        physics.Body.__init__(self, scale, init_pos, init_velocity, init_angular_velocity, init_angle)
         self.display_pos = self.display_coord_transform(self.position)
-        self.velocity = v.vector(init_velocity[0], init_velocity[1])
-        self.acceleration = v.vector()
+        self.display_image = image
+        self.save_state()
+
         self.accelerating = False
+        self.rotating = 0
 
         self.display_pos_delta = 0
         self.display_height_delta = 0
 
-        # Initialise the angle and direction of the sprite
-        self.direction = v.vector()  # A unit vector to represent the sprite's direction
-        self._angle = 0  # Angle in radians clockwise from the y-axis (0 is pointing straight up)
-        self.angle = init_angle
-        self.angular_velocity = init_angular_velocity  # Angular velocity in rad/s
-        self.rotating = 0
-
     def update(self):
         """
-        Method to update the sprite by calculating its position for the next frame
-        Uses Euler integration to calculate the updated position, velocity and rotation
+        Method to update the sprite by calculating its position for the next physics step
         """
-        dt = self.game.dt  # Simulation timestep
+        self.save_state()
+        self.integrate(self.game.dt)
 
-        # Integrate to get the new position and velocity
-        self.velocity += self.acceleration * dt
-        self.position += self.velocity * dt
-
-        self.angle = self.angle + self.angular_velocity * dt
-
-    def check_collision(self, other):
+    def save_state(self):
         """
-        Method to check if the sprite has collided with another passed in as other.
-
-        :param other:
+        Method to keep the sprite's position and angle before a physics step, so that drawing can interpolate from them
         """
-        collided = False
-
-        if other.corners()[0][0] < self.position.x < other.corners()[2][0]:
-            if other.corners()[0][1] < self.position.y < other.corners()[2][1]:
-                collided = True
+        self.previous_position = self.position
+        self.previous_angle = self.angle
 
-        return collided
-
-    def corners(self):
+    def place(self, alpha=1.0):
         """
-        Method to return a tuple of each of the sprite's corners.
-        Starts from the top left, going clockwise
-        :return corners:
+        Method to work out where the sprite is drawn on screen and the offsets of the view from it
+        :param alpha: how far to draw the sprite between its state before the last physics step (0) and its current
+                      state (1)
         """
-        c1 = (self.position.x - self.scale[0] / 2, self.position.y - self.scale[1] / 2)
-        c2 = (self.position.x + self.scale[0] / 2, self.position.y - self.scale[1] / 2)
-        c3 = (self.position.x + self.scale[0] / 2, self.position.y + self.scale[1] / 2)
-        c4 = (self.position.x - self.scale[0] / 2, self.position.y + self.scale[1] / 2)
-        corners = (c1, c2, c3, c4)
-        return corners
+        position = self.previous_position + (self.position - self.previous_position) * alpha
+        angle = self.previous_angle + (self.angle - self.previous_angle) * alpha
 
-    def draw(self):
-        """
-        Method to draw the sprite onto the screen
-        """
         # Rotate image (angle is stored in radians clockwise from 0, has to be converted to degrees anticlockwise)
-        scale = (self.scale[0] * self.game.scale[0], self.scale[1] * self.game.scale[1])
-        scaled_image = pygame.transform.scale(self.image, scale)
-        rotated_image = pygame.transform.rotate(scaled_image, self.angle * (-180 / math.pi))
+        scale = (round(self.scale[0] * self.game.scale[0]), round(self.scale[1] * self.game.scale[1]))
+        rotated_image = self.game.rotation_cache.get(self.image, scale, angle * (-180 / math.pi))
+        self.display_image = rotated_image
 
-        # Calculate where the rocket should be on screen
-        self.display_pos = self.display_coord_transform(self.position, rotated_image.get_size())
+        # Calculate where the rocket should be on screen, in layout coordinates
+        img_dims = (rotated_image.get_width() / self.game.scale[0], rotated_image.get_height() / self.game.scale[1])
+        self.display_pos = self.display_coord_transform(position, img_dims)
         target_pos = self.display_pos
 
         # If it is too close to either edge then clamp it
@@ -121,28 +95,23 @@ class Sprite:
         # Calculate the vertical offset
         self.display_height_delta = target_pos[1] - self.display_pos[1]
 
-        # Draw image to screen
-        self.game.screen.blit(rotated_image, self.display_pos)
+    def draw(self):
+        """
+        Method to draw the sprite onto the screen where it was last placed
+        """
+        self.game.screen.blit(self.display_image, self.game.to_screen(self.display_pos))
 
     def display_coord_transform(self, coords, img_dims=(0, 0)):
+        # The image is centred on the sprite's position, which is also the centre of its collision hull
         display_pos = (coords[0] + (self.screen_dims[0] / 2) - (img_dims[0] / 2),
-                       self.screen_dims[1] - coords[1])
+                       self.screen_dims[1] - coords[1] - (img_dims[1] / 2))
         return display_pos
 
-    @property
-    def angle(self):
-        return self._angle
 
-    @angle.setter
-    def angle(self, new_angle):
-        self._angle = new_angle
-        self.direction = v.vector(math.sin(new_angle), math.cos(new_angle))
-
-
-class Rocket(Sprite):
+class Rocket(Sprite, physics.Lander):
     """
     Class to represent the rocket and give it some necessary methods
-    Child class of Sprite
+    Child class of Sprite, with its physics from physics.Lander
     """
 
     def __init__(self, game):
@@ -150,13 +119,7 @@ class Rocket(Sprite):
 
         image = game.sprite_images["lander"]
 
-        self.height = 0
-
-        self.throttle = 0
-        self.fuel = 100
-        self.max_throttle = 50
-        self.m = 25
-        self.twr_max = self.max_throttle/self.m
+        self.init_engine()
 
         super().__init__(game, image, (75, 75), start_pos)
 
@@ -164,88 +127,35 @@ class Rocket(Sprite):
         """
         Method to reset the rocket's position on a new game
         """
-        self.position = v.vector(position[0], position[1])
-        self.velocity = v.vector(velocity[0], velocity[1])
-        self.acceleration = v.vector()
-        self.angle = 0
-        self.height = 0
+        physics.Lander.reset(self, position, velocity)
+        self.save_state()
         self.display_pos_delta = 0
         self.display_height_delta = 0
 
-        self.accelerating = False
-        self.rotating = 0
-
-        self.throttle = 0
-        self.fuel = 100
-
-        self.draw()
+        self.place()
 
     def update(self):
         """
-        Overloaded update method for the Rocket class. Sets the acceleration and angular velocity
-        of the rocket depending on keyboard inout and current speed
+        Overloaded update method for the Rocket class. Steps the lander physics using the keyboard input given since the
+        last physics step and the height of the moon below the rocket
         """
-        self.height = self.position.y - self.game.moon.get_height(self.display_pos[0])
-        dt = self.game.dt  # Simulation timestep
+        firing = self.accelerating and self.fuel > 0
 
-        if self.height <= 0:
-            self.land()
-            self.acceleration = v.vector()
-            self.velocity = v.vector()
-            self.position = v.vector(self.position.x, self.game.moon.get_height(self.display_pos[0]))
-        else:
-            self.acceleration = v.vector(0, -self.game.g)
-
-            # Set angular velocity depending on whether the a or d keys have been pressed
-            if self.rotating == 1:
-                self.angular_velocity = -0.9
-            elif self.rotating == 2:
-                self.angular_velocity = 0.9
-            else:
-                self.angular_velocity = 0
-
-        d_throttle = 2.5
-        if self.fuel > 0:
-            if self.accelerating:
-                self.image = self.game.sprite_images["lander_flames"]
-                self.throttle += d_throttle * self.max_throttle * dt
-            else:
-                self.image = self.game.sprite_images["lander"]
-                self.throttle -= d_throttle * self.max_throttle * dt
-            if self.throttle > self.max_throttle:
-                self.throttle = self.max_throttle
-            elif self.throttle < 0:
-                self.throttle = 0
+        self.save_state()
+        outcome = self.step(self.game.dt, self.game.g, self.game.moon.terrain)
+        if outcome is not None:
+            self.land(outcome)
+        elif firing:
+            self.image = self.game.sprite_images["lander_flames"]
         else:
             self.image = self.game.sprite_images["lander"]
-            self.throttle = 0
 
-        twr = self.throttle / self.m
-        self.acceleration += (self.direction * twr)
-        self.fuel -= self.throttle * 0.015 * dt
-        self.m = 10 + (15 * self.fuel/100)
-        self.twr_max = self.max_throttle / self.m if self.fuel > 0 else 0
-
-        self.rotating = 0
-        self.accelerating = False
-        super().update()
-
-    def land(self):
+    def land(self, outcome):
         """
-        Method called when the rocket lands to check whether it crashes
+        Method called when the rocket lands to show whether it crashed
         """
-        if self.velocity.mag > 25:
+        if outcome == "crash":
             self.image = self.game.sprite_images["explosion"]
-            self.game.game_over("crash")
         else:
             self.image = self.game.sprite_images["lander"]
-            self.game.game_over("safe")
-
-    def move_forward(self):
-        self.accelerating = True
-
-    def turn_left(self):
-        self.rotating = 1
-
-    def turn_right(self):
-        self.rotating = 2
+        self.game.game_over(outcome)
@@ -0,0 +1,280 @@
+"""
+Headless simulation of a Moon Lander flight
+Steps a physics.Lander over the moon's terrain without pygame, so that flights can be run on machines with no display
+and without paying for rendering. MoonLander is a rendering front end over the same Lander physics and terrain.
+"""
+import random
+
+import numpy as np
+
+import integrators
+import physics
+import terrain
+
+# Status of each lander in a BatchSimulation
+FLYING = 0
+SAFE = 1
+CRASH = 2
+
+
+class Simulation:
+    """
+    Class to simulate a single lander flying over the moon
+    """
+
+    def __init__(self, seed=None, g=1.5, chunk_size: int = 8192, max_chunks: int = 16, cache=None,
+                 integrator="semi_implicit_euler"):
+        """
+        Constructor method for the simulation.
+
+        :param seed: terrain seed, chosen at random (as in the game) if not given
+        :param g: gravitational acceleration
+        :param chunk_size: number of terrain samples in each chunk
+        :param max_chunks: number of terrain chunks kept in memory
+        :param cache: optional terrain.HeightMapCache to store the terrain chunks in
+        :param integrator: name of the integrator from integrators.INTEGRATORS used to move the lander
+        """
+        self.noise = terrain.TerrainNoise(octaves=3, seed=random.randint(0, 1000) if seed is None else seed)
+        self.terrain = terrain.ChunkedTerrain(self.noise, chunk_size, max_chunks, cache)
+        self.lander = physics.Lander(integrator=integrator)
+        self.g = g
+
+        self.time = 0
+        self.outcome = None
+
+    def reset(self, position=(0, 5000), velocity=(25, 0)):
+        """
+        Method to start a new flight from the given position and velocity
+        """
+        self.lander.reset(position, velocity)
+        self.time = 0
+        self.outcome = None
+
+    def ground_height(self, x):
+        """
+        Method to return the height of the ground at world x coordinate x
+        """
+        return self.terrain.interpolate(x)
+
+    def step(self, dt, forward=False, left=False, right=False):
+        """
+        Method to advance the flight by one timestep with the given control inputs
+        :param dt: simulation timestep
+        :param forward: whether the engine is being fired
+        :param left: whether the lander is turning left
+        :param right: whether the lander is turning right
+        :return outcome: None while flying, otherwise "crash" or "safe"
+        """
+        if forward:
+            self.lander.move_forward()
+        if left:
+            self.lander.turn_left()
+        if right:
+            self.lander.turn_right()
+
+        self.outcome = self.lander.step(dt, self.g, self.terrain)
+        self.time += dt
+        return self.outcome
+
+    def run(self, controller=None, dt=0.16, max_steps: int = 100000):
+        """
+        Method to fly until the lander touches the ground or max_steps have been taken
+        :param controller: optional function called with the simulation every step, returning (forward, left, right)
+        :param dt: simulation timestep
+        :param max_steps:
+        :return outcome: "crash", "safe" or None if the flight did not finish
+        """
+        for _ in range(max_steps):
+            controls = (False, False, False) if controller is None else controller(self)
+            if self.step(dt, *controls) is not None:
+                break
+        return self.outcome
+
+
+class BatchSimulation:
+    """
+    Class to simulate many landers at once over the same terrain
+
+    The state of the landers is held as a structure of arrays, one numpy array per quantity with one element (lane) per
+    lander, and every step applies the physics of physics.Lander.step to all the lanes at once. Landers that have
+    touched down are masked out and keep their final state.
+    """
+
+    def __init__(self, n: int, seed=None, g=1.5, integrator="semi_implicit_euler"):
+        """
+        Constructor method for the batch simulation.
+
+        :param n: number of landers
+        :param seed: terrain seed, chosen at random (as in the game) if not given
+        :param g: gravitational acceleration
+        :param integrator: name of the integrator from integrators.INTEGRATORS used to move the landers
+        """
+        self.n = n
+        self.noise = terrain.TerrainNoise(octaves=3, seed=random.randint(0, 1000) if seed is None else seed)
+        self.g = g
+        self.integrator = integrators.get(integrator)
+
+        self.max_throttle = 50
+        self.crash_speed = physics.Lander.crash_speed
+        self.half_width, self.half_height = 75 / 2, 75 / 2
+
+        # Bounds used to rule out landers that are too high to be touching the ground
+        self.radius = np.hypot(self.half_width, self.half_height)
+        self.reach = self.noise.max_slope() * self.radius
+        self.ceiling = self.noise.height_bounds()[1]
+
+        self.x = np.zeros(n)
+        self.y = np.zeros(n)
+        self.vx = np.zeros(n)
+        self.vy = np.zeros(n)
+        self.angle = np.zeros(n)
+        self.throttle = np.zeros(n)
+        self.fuel = np.zeros(n)
+        self.m = np.zeros(n)
+        self.height = np.zeros(n)
+
+        self.status = np.zeros(n, dtype=np.int8)
+        self.touchdown_speed = np.zeros(n)
+        self.touchdown_time = np.zeros(n)
+
+        self.time = 0
+        self.reset()
+
+    def reset(self, position=(0, 5000), velocity=(25, 0), fuel=100, angle=0, lanes=None):
+        """
+        Method to start a new set of flights. Each argument is either a single value for every lander or an array with
+        one value per lander (shape (n, 2) for position and velocity).
+        :param lanes: optional boolean mask of the landers to restart, leaving the others and the batch time as they are.
+        Array arguments then have one value per restarted lander.
+        """
+        if lanes is None:
+            lanes = slice(None)
+            self.time = 0
+        n = len(self.x[lanes])
+
+        position = np.broadcast_to(np.asarray(position, dtype=np.float64), (n, 2))
+        velocity = np.broadcast_to(np.asarray(velocity, dtype=np.float64), (n, 2))
+        self.x[lanes] = position[:, 0]
+        self.y[lanes] = position[:, 1]
+        self.vx[lanes] = velocity[:, 0]
+        self.vy[lanes] = velocity[:, 1]
+        self.angle[lanes] = angle
+        self.throttle[lanes] = 0
+        self.fuel[lanes] = fuel
+        self.m[lanes] = 10 + 15*self.fuel[lanes]/100
+        self.height[lanes] = 0
+
+        self.status[lanes] = FLYING
+        self.touchdown_speed[lanes] = 0
+        self.touchdown_time[lanes] = 0
+
+    @property
+    def flying(self):
+        """
+        Boolean mask of the landers that are still flying
+        """
+        return self.status == FLYING
+
+    def ground_height(self, x):
+        """
+        Method to return the height of the ground at each world x coordinate in the array x
+        """
+        return self.noise.interpolate(x)
+
+    def touching_ground(self, lanes, ground):
+        """
+        Method to check which of the given landers touch or overlap the ground, using the same hull test as
+        terrain.ChunkedTerrain.hull_collides
+        Landers that cannot reach the ground within their hull's radius, given the height of the ground below their
+        centres and the steepest the terrain can be, are ruled out before the exact test.
+        :param lanes: boolean mask of the landers to check
+        :param ground: height of the ground below the centre of each lander
+        :return touching: boolean mask of the landers touching the ground
+        """
+        touching = np.zeros(self.n, dtype=bool)
+        candidates = np.flatnonzero(lanes & (self.y - self.radius <= np.minimum(ground + self.reach, self.ceiling)))
+        if len(candidates) == 0:
+            return touching
+
+        angle = self.angle[candidates]
+        hull_x, hull_y = physics.hull_corners(self.x[candidates], self.y[candidates], np.sin(angle), np.cos(angle),
+                                              self.half_width, self.half_height)
+        hull_x = np.stack(hull_x, axis=-1)
+        hull_y = np.stack(hull_y, axis=-1)
+
+        # Evaluate the ground at every sample under each candidate's hull, padding narrower hulls to the same length
+        first = np.ceil(hull_x.min(axis=-1))
+        last = np.floor(hull_x.max(axis=-1))
+        xs = first[:, None] + np.arange(int((last - first).max()) + 1)
+        valid = xs <= last[:, None]
+        touching[candidates] = terrain.hull_intersects(hull_x, hull_y, xs, self.noise.sample(xs),
+                                                       self.noise.interpolate(hull_x), valid)
+        return touching
+
+    def step(self, dt, forward=False, left=False, right=False):
+        """
+        Method to advance every lander that is still flying by one timestep
+        Each control input is either a single bool for every lander or a boolean array with one value per lander
+
+        :param dt: simulation timestep
+        :param forward: whether the engine is being fired
+        :param left: whether the lander is turning left
+        :param right: whether the lander is turning right
+        :return flying: number of landers still flying
+        """
+        flying = self.flying
+        ground = self.ground_height(self.x)
+        np.subtract(self.y - self.half_height, ground, out=self.height, where=flying)
+
+        # Landers that have reached the ground stop, and are safe if they were slow enough
+        landed = self.touching_ground(flying, ground)
+        if landed.any():
+            speed = np.hypot(self.vx[landed], self.vy[landed])
+            self.status[landed] = np.where(speed > self.crash_speed, CRASH, SAFE)
+            self.touchdown_speed[landed] = speed
+            self.touchdown_time[landed] = self.time
+            self.vx[landed] = 0
+            self.vy[landed] = 0
+            flying &= ~landed
+
+        # Turning right takes priority when both are pressed, as in physics.Lander
+        angular_velocity = np.where(right, 0.9, np.where(left, -0.9, 0.0))
+
+        d_throttle = np.where(forward, 2.5, -2.5) * self.max_throttle * dt
+        throttle = np.clip(self.throttle + d_throttle, 0, self.max_throttle)
+        throttle = np.where(self.fuel > 0, throttle, 0.0)
+
+        twr = throttle / self.m
+        fuel = self.fuel - throttle * 0.015 * dt
+
+        def acceleration(x, y, vx, vy, t):
+            # The engine's thrust turns with each lander as it rotates during the timestep
+            angle = self.angle + angular_velocity * t
+            return np.sin(angle) * twr, np.cos(angle) * twr - self.g
+
+        x, y, vx, vy = self.integrator(self.x, self.y, self.vx, self.vy, acceleration, dt)
+        np.copyto(self.throttle, throttle, where=flying)
+        np.copyto(self.fuel, fuel, where=flying)
+        np.copyto(self.m, 10 + 15*fuel/100, where=flying)
+        np.copyto(self.vx, vx, where=flying)
+        np.copyto(self.vy, vy, where=flying)
+        np.copyto(self.x, x, where=flying)
+        np.copyto(self.y, y, where=flying)
+        np.copyto(self.angle, self.angle + angular_velocity * dt, where=flying)
+
+        self.time += dt
+        return int(np.count_nonzero(flying))
+
+    def run(self, controller=None, dt=0.16, max_steps: int = 100000):
+        """
+        Method to fly until every lander has touched down or max_steps have been taken
+        :param controller: optional function called with the simulation every step, returning (forward, left, right)
+        :param dt: simulation timestep
+        :param max_steps:
+        :return status: array of FLYING, SAFE or CRASH for each lander
+        """
+        for _ in range(max_steps):
+            controls = (False, False, False) if controller is None else controller(self)
+            if self.step(dt, *controls) == 0:
+                break
+        return self.status
@@ -0,0 +1,111 @@
+"""
+Uniform grid spatial hash for broad-phase collision detection
+Each object is filed under every grid cell its axis-aligned bounding box (AABB) touches, so only objects sharing a cell
+need to be compared. With objects no larger than a few cells the cost grows roughly linearly with the number of objects,
+rather than with the number of pairs.
+"""
+import math
+from collections import defaultdict
+
+
+class SpatialHash:
+    """
+    Class to find the pairs of objects whose bounding boxes overlap
+
+    The hash is rebuilt every frame with build(), which caches each object's AABB for the frame. AABBs are in world
+    coordinates as (left, bottom, right, top).
+    """
+
+    def __init__(self, cell_size=128):
+        """
+        :param cell_size: width and height of the grid cells, best set to around the size of a typical object
+        """
+        self.cell_size = cell_size
+        self._cells = defaultdict(list)
+        self._items = []
+        self._aabbs = []
+        # Index of each object by id, for looking up its cached bounding box
+        self._indices = {}
+
+    def clear(self):
+        self._cells.clear()
+        self._items = []
+        self._aabbs = []
+        self._indices = {}
+
+    def build(self, bodies):
+        """
+        Method to refill the hash with the bodies' current bounding boxes
+        :param bodies: iterable of physics.Body (or anything with an aabb() method)
+        """
+        self.clear()
+        for body in bodies:
+            self.insert(body, body.aabb())
+
+    def insert(self, item, aabb):
+        """
+        Method to add an object to the hash
+        :param item:
+        :param aabb: (left, bottom, right, top) of the object
+        """
+        index = len(self._items)
+        self._items.append(item)
+        self._aabbs.append(aabb)
+        self._indices[id(item)] = index
+        for cell in self._cells_covering(aabb):
+            self._cells[cell].append(index)
+
+    def aabb(self, item):
+        """
+        Method to return the bounding box cached for an object when it was inserted
+        """
+        return self._aabbs[self._indices[id(item)]]
+
+    def query(self, aabb):
+        """
+        Method to return the objects whose bounding boxes overlap a box
+        :param aabb: (left, bottom, right, top)
+        :return items: list of the overlapping objects
+        """
+        found = set()
+        for cell in self._cells_covering(aabb):
+            for index in self._cells.get(cell, ()):
+                if index not in found and _overlap(aabb, self._aabbs[index]):
+                    found.add(index)
+        return [self._items[index] for index in sorted(found)]
+
+    def candidate_pairs(self):
+        """
+        Method to return every pair of objects whose bounding boxes overlap, each pair once
+        These are candidates for an exact collision test, such as physics.Body.check_collision
+        :return pairs: list of (item, item) tuples
+        """
+        aabbs = self._aabbs
+        seen = set()
+        pairs = []
+        for indices in self._cells.values():
+            for i in range(len(indices)):
+                a = indices[i]
+                for b in indices[i + 1:]:
+                    # Objects spanning several cells meet in each of them, so skip pairs that were already tested
+                    key = (a, b)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    if _overlap(aabbs[a], aabbs[b]):
+                        pairs.append((self._items[a], self._items[b]))
+        return pairs
+
+    def _cells_covering(self, aabb):
+        left, bottom, right, top = aabb
+        size = self.cell_size
+        for cell_x in range(math.floor(left / size), math.floor(right / size) + 1):
+            for cell_y in range(math.floor(bottom / size), math.floor(top / size) + 1):
+                yield cell_x, cell_y
+
+    def __len__(self):
+        return len(self._items)
+
+
+def _overlap(a, b):
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
@@ -0,0 +1,280 @@
+"""
+Parameter sweep runner for Moon Lander landing outcomes
+Flies a grid or random sample of starting conditions and terrain seeds across a process pool using
+simulation.BatchSimulation, streaming one compact record per flight to a results file. An interrupted sweep resumes
+from the last finished chunk when it is run again with the same results file.
+
+Example:
+    python sweep.py results.bin --seeds 1,2,3 x=-2000:2000:41 y=2000:6000:5 vx=0:40:9 burn=-25:-5:5
+    python sweep.py results.bin --samples 10000000 --seeds 1:101 x=-5000:5000 y=1000:6000 vx=-40:40 vy=-20:0
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import numpy as np
+
+import file_store
+import simulation
+
+# Parameters of a flight, with the values used by MoonLander.game_loop. burn is the vertical speed below which the
+# engine is fired (NaN never fires it)
+PARAMETERS = ("x", "y", "vx", "vy", "fuel", "burn")
+DEFAULTS = {"x": 0, "y": 5000, "vx": 25, "vy": 0, "fuel": 100, "burn": float("nan")}
+
+# One record per flight, packed to 17 bytes
+RESULT_DTYPE = np.dtype([("index", "<u4"), ("status", "i1"), ("touchdown_speed", "<f4"),
+                         ("fuel", "<f4"), ("time", "<f4")])
+
+
+class Sweep:
+    """
+    Class to describe a parameter sweep and generate the starting conditions of each chunk of flights
+
+    In grid mode every combination of terrain seed and parameter values is flown, with flight i being the i'th
+    combination in row-major order over (seed, x, y, vx, vy, fuel, burn). In random mode each parameter is drawn
+    uniformly from its range, with every chunk drawn from its own random generator so that it can be regenerated alone.
+    """
+
+    def __init__(self, ranges, seeds=(1,), samples=None, sample_seed=0, dt=0.16, max_steps: int = 20000,
+                 chunk_size: int = 10000):
+        """
+        Constructor method for the sweep.
+
+        :param ranges: dictionary of parameter name to a single value, (low, high) or (low, high, num) for a grid axis
+        :param seeds: terrain seeds to fly over, which must be non-zero as TerrainNoise picks a random seed for 0
+        :param samples: number of random flights, or None for a grid sweep
+        :param sample_seed: seed for the random generator in random mode
+        :param dt: simulation timestep
+        :param max_steps: steps after which a flight that has not touched down is recorded as still flying
+        :param chunk_size: number of flights given to a worker at a time
+        """
+        for name in ranges:
+            if name not in PARAMETERS:
+                raise ValueError("unknown sweep parameter: {}".format(name))
+        # Seed 0 would fly different random terrain in every chunk, so results could not be reproduced or resumed
+        if 0 in seeds:
+            raise ValueError("sweep seeds expected to be non-zero")
+
+        self.ranges = {name: tuple(ranges.get(name, (DEFAULTS[name],))) for name in PARAMETERS}
+        self.seeds = [int(seed) for seed in seeds]
+        self.samples = samples
+        self.sample_seed = sample_seed
+        self.dt = dt
+        self.max_steps = max_steps
+        self.chunk_size = chunk_size
+
+        if samples is None:
+            self._axes = [np.asarray(self.seeds)] + [_axis(self.ranges[name]) for name in PARAMETERS]
+            self.total = int(np.prod([len(axis) for axis in self._axes]))
+        else:
+            self.total = samples
+
+    def num_chunks(self):
+        return -(-self.total // self.chunk_size)
+
+    def chunk_parameters(self, chunk_id: int):
+        """
+        Method to return the flight indices, terrain seeds and parameter arrays for a chunk
+        :param chunk_id:
+        :return indices, seeds, parameters:
+        """
+        indices = np.arange(chunk_id*self.chunk_size, min((chunk_id+1)*self.chunk_size, self.total))
+
+        if self.samples is None:
+            positions = np.unravel_index(indices, [len(axis) for axis in self._axes])
+            seeds = self._axes[0][positions[0]]
+            parameters = {name: axis[position]
+                          for name, axis, position in zip(PARAMETERS, self._axes[1:], positions[1:])}
+        else:
+            rng = np.random.default_rng([self.sample_seed, chunk_id])
+            seeds = rng.choice(self.seeds, len(indices))
+            parameters = {name: _sample(rng, self.ranges[name], len(indices)) for name in PARAMETERS}
+
+        return indices, seeds, parameters
+
+    def to_dict(self):
+        return {"ranges": self.ranges, "seeds": self.seeds, "samples": self.samples, "sample_seed": self.sample_seed,
+                "dt": self.dt, "max_steps": self.max_steps, "chunk_size": self.chunk_size}
+
+    @classmethod
+    def from_dict(cls, spec):
+        return cls(**spec)
+
+
+def _axis(value_range):
+    if len(value_range) == 3:
+        return np.linspace(value_range[0], value_range[1], int(value_range[2]))
+    if len(value_range) == 1:
+        return np.asarray(value_range, dtype=np.float64)
+    raise ValueError("grid sweeps need a number of points for each range, e.g. x=-1000:1000:21")
+
+
+def _sample(rng, value_range, n):
+    if len(value_range) == 1:
+        return np.full(n, value_range[0], dtype=np.float64)
+    return rng.uniform(value_range[0], value_range[1], n)
+
+
+def run_chunk(spec, chunk_id):
+    """
+    Function to fly every flight in a chunk, grouping the flights by terrain seed into batch simulations
+    :param spec: dictionary describing the Sweep
+    :param chunk_id:
+    :return chunk_id, records:
+    """
+    sweep = Sweep.from_dict(spec)
+    indices, seeds, parameters = sweep.chunk_parameters(chunk_id)
+    records = np.zeros(len(indices), dtype=RESULT_DTYPE)
+    records["index"] = indices
+
+    for seed in np.unique(seeds):
+        lanes = seeds == seed
+        batch = simulation.BatchSimulation(int(np.count_nonzero(lanes)), seed=int(seed))
+        batch.reset(np.column_stack((parameters["x"][lanes], parameters["y"][lanes])),
+                    np.column_stack((parameters["vx"][lanes], parameters["vy"][lanes])),
+                    fuel=parameters["fuel"][lanes])
+
+        burn = parameters["burn"][lanes]
+        batch.run(lambda sim: (sim.vy < burn, False, False), sweep.dt, sweep.max_steps)
+
+        records["status"][lanes] = batch.status
+        records["touchdown_speed"][lanes] = batch.touchdown_speed
+        records["fuel"][lanes] = batch.fuel
+        records["time"][lanes] = np.where(batch.flying, batch.time, batch.touchdown_time)
+
+    return chunk_id, records
+
+
+def _run_chunk_star(args):
+    return run_chunk(*args)
+
+
+def run_sweep(sweep, path, processes=None, progress=None):
+    """
+    Function to run a sweep across a process pool, appending the records of each finished chunk to the results file
+
+    Progress is kept in a JSON file next to the results (path + ".json") holding the sweep description, the finished
+    chunks and the number of records written. Running the same sweep again with the same path resumes it; any records
+    written after the last saved progress are discarded first.
+
+    :param sweep: Sweep to run
+    :param path: path of the results file
+    :param processes: number of worker processes, defaulting to one per core
+    :param progress: optional function called with (flights done, total flights) after each chunk
+    """
+    meta_path = path + ".json"
+    spec = sweep.to_dict()
+    meta = {"dtype": RESULT_DTYPE.descr, "sweep": spec, "chunks_done": [], "records": 0}
+
+    if os.path.exists(meta_path):
+        with open(meta_path) as meta_file:
+            saved = json.load(meta_file)
+        if json.dumps(spec, sort_keys=True) != json.dumps(saved["sweep"], sort_keys=True):
+            raise ValueError("{} holds the results of a different sweep".format(path))
+        meta = saved
+
+    done = set(meta["chunks_done"])
+    todo = [(spec, chunk_id) for chunk_id in range(sweep.num_chunks()) if chunk_id not in done]
+    flights_done = meta["records"]
+    if progress is not None:
+        progress(flights_done, sweep.total)
+
+    with open(path, "ab") as results_file:
+        results_file.truncate(meta["records"] * RESULT_DTYPE.itemsize)
+
+        with multiprocessing.Pool(processes) as pool:
+            for chunk_id, records in pool.imap_unordered(_run_chunk_star, todo):
+                results_file.write(records.tobytes())
+                results_file.flush()
+                os.fsync(results_file.fileno())
+
+                flights_done += len(records)
+                meta["chunks_done"].append(chunk_id)
+                meta["records"] = flights_done
+                _write_json(meta_path, meta)
+
+                if progress is not None:
+                    progress(flights_done, sweep.total)
+
+
+def _write_json(path, data):
+    with file_store.write_atomic(path) as temp_file:
+        json.dump(data, temp_file)
+
+
+def load_results(path):
+    """
+    Function to memory-map the records of a sweep results file
+    Records are in the order their chunks finished; use the index field (and Sweep.chunk_parameters) to match them up
+    with their starting conditions.
+    """
+    with open(path + ".json") as meta_file:
+        records = json.load(meta_file)["records"]
+    if records == 0:
+        return np.zeros(0, dtype=RESULT_DTYPE)
+    return np.memmap(path, dtype=RESULT_DTYPE, mode="r", shape=(records,))
+
+
+def _parse_range(text):
+    name, _, values = text.partition("=")
+    parts = values.split(":")
+    if not 1 <= len(parts) <= 3:
+        raise argparse.ArgumentTypeError("ranges look like name=value, name=low:high or name=low:high:num")
+    value_range = [float(part) for part in parts]
+    if len(value_range) == 3:
+        value_range[2] = int(value_range[2])
+    return name, tuple(value_range)
+
+
+def _parse_seeds(text):
+    if ":" in text:
+        low, high = text.split(":")
+        return list(range(int(low), int(high)))
+    return [int(seed) for seed in text.split(",")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a sweep of Moon Lander flights and record their outcomes")
+    parser.add_argument("results", help="results file (resumed if it already exists)")
+    parser.add_argument("ranges", nargs="*", type=_parse_range,
+                        help="parameter ranges, name=value, name=low:high or name=low:high:num for {}".format(
+                            ", ".join(PARAMETERS)))
+    parser.add_argument("--seeds", type=_parse_seeds, default=[1],
+                        help="non-zero terrain seeds, as 1,2,3 or low:high")
+    parser.add_argument("--samples", type=int, help="fly this many random samples instead of a grid")
+    parser.add_argument("--sample-seed", type=int, default=0)
+    parser.add_argument("--dt", type=float, default=0.16)
+    parser.add_argument("--max-steps", type=int, default=20000)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--processes", type=int)
+    args = parser.parse_intermixed_args(argv)
+
+    sweep = Sweep(dict(args.ranges), args.seeds, args.samples, args.sample_seed, args.dt, args.max_steps,
+                  args.chunk_size)
+    start_time = time.perf_counter()
+    start_done = []
+
+    def show_progress(done, total):
+        if not start_done:
+            start_done.append(done)
+        elapsed = time.perf_counter() - start_time
+        rate = (done - start_done[0]) / elapsed if elapsed > 0 else 0
+        eta = (total - done) / rate if rate > 0 else float("inf")
+        sys.stderr.write("\r{:,}/{:,} flights  {:,.0f} flights/s  ETA {:.0f} s ".format(done, total, rate, eta))
+        sys.stderr.flush()
+
+    run_sweep(sweep, args.results, args.processes, show_progress)
+    sys.stderr.write("\n")
+
+    results = load_results(args.results)
+    counts = np.bincount(results["status"], minlength=3)
+    print("{:,} flights: {:,} safe, {:,} crashed, {:,} still flying".format(
+        len(results), counts[simulation.SAFE], counts[simulation.CRASH], counts[simulation.FLYING]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,717 @@
+"""
+Terrain generation for the Moon Lander game
+Generates the moon's height map from 1D Perlin noise, evaluating whole ranges of sample indices at once with numpy
+"""
+import math
+import os
+import queue
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+import file_store
+
+DEFAULT_CACHE_DIR = file_store.cache_path("terrain")
+
+
+class TerrainNoise:
+    """
+    Class to generate terrain heights from 1D Perlin noise
+
+    Produces the same noise as perlin_noise.PerlinNoise(octaves, seed) sampled at index*spacing, but works on arrays of
+    indices so a whole height map can be generated in one call rather than one Python call per point.
+    """
+
+    def __init__(self, octaves=3, seed=None, spacing=0.0005, base=150, amplitude=500):
+        """
+        Constructor method for the terrain noise generator.
+
+        :param octaves: number of noise lattice cells per unit of noise coordinate
+        :param seed: noise seed, chosen at random if not given (matching perlin_noise)
+        :param spacing: noise coordinate distance between two adjacent samples
+        :param base: height of the terrain where the noise is zero
+        :param amplitude: scale applied to the noise value
+        """
+        if octaves <= 0:
+            raise ValueError("octaves expected to be positive number")
+
+        self.octaves = octaves
+        self.seed = seed if seed else random.randint(1, 10**5)
+        self.spacing = spacing
+        self.base = base
+        self.amplitude = amplitude
+
+        # Gradients of the lattice points already used, stored as one contiguous array covering [_lattice_start, ...)
+        # The lock lets the noise be sampled from a TerrainLoader's thread and the game at the same time
+        self._lattice_start = 0
+        self._gradients = np.empty(0)
+        self._lock = threading.Lock()
+
+    def heights(self, start: int = 0, n: int = 0):
+        """
+        Method to return the heights of n consecutive samples starting from index start
+        :param start:
+        :param n:
+        :return heights: numpy array of n heights
+        """
+        return self.sample(np.arange(start, start + n, dtype=np.float64))
+
+    def sample(self, indices):
+        """
+        Method to return the terrain height at each of the (possibly fractional) sample indices passed in
+        :param indices: array-like of sample indices
+        :return heights: numpy array of heights with the same shape as indices
+        """
+        return self.base + self.amplitude * self.noise(np.asarray(indices, dtype=np.float64) * self.spacing)
+
+    def noise(self, coordinates):
+        """
+        Method to evaluate the raw Perlin noise at an array of noise coordinates
+        :param coordinates: numpy array of noise coordinates
+        :return noise: numpy array of noise values
+        """
+        x = coordinates * self.octaves
+        lattice = np.floor(x)
+        dist = x - lattice
+
+        # Each sample gets a contribution from the lattice point on either side of it
+        lattice = lattice.astype(np.int64)
+        g0, g1 = self._get_gradients(lattice)
+        return _fade(1 - dist) * g0 * dist + _fade(dist) * g1 * (dist - 1)
+
+    def _get_gradients(self, lattice):
+        """
+        Method to return the gradients at the lattice points to the left and right of each sample, generating any that
+        have not been needed before
+        :param lattice: integer array of the lattice point to the left of each sample
+        :return gradients: pair of arrays for the left and right lattice points
+        """
+        if lattice.size == 0:
+            return np.empty(0), np.empty(0)
+
+        with self._lock:
+            return self._lookup_gradients(lattice)
+
+    def _lookup_gradients(self, lattice):
+        low = int(lattice.min())
+        high = int(lattice.max()) + 1
+        if len(self._gradients) == 0:
+            self._lattice_start = low
+            self._gradients = self._make_gradients(low, high + 1)
+        else:
+            cached_high = self._lattice_start + len(self._gradients)
+            left = self._make_gradients(low, self._lattice_start)
+            right = self._make_gradients(cached_high, high + 1)
+            if len(left) or len(right):
+                self._lattice_start -= len(left)
+                self._gradients = np.concatenate((left, self._gradients, right))
+
+        offsets = lattice - self._lattice_start
+        return self._gradients[offsets], self._gradients[offsets + 1]
+
+    def _make_gradients(self, low, high):
+        """
+        Method to return the random gradients of the lattice points in [low, high)
+        Uses the same per-point seeding as perlin_noise so that a given seed produces the same terrain
+        """
+        return np.array([random.Random(self.seed * max(1, abs(point + 1))).uniform(-1, 1)
+                         for point in range(low, high)], dtype=np.float64)
+
+    def interpolate(self, x):
+        """
+        Method to return the terrain height at each world x coordinate in x, interpolated linearly between the samples
+        either side (matching ChunkedTerrain.interpolate)
+        :param x: array-like of world x coordinates
+        :return heights: numpy array of heights with the same shape as x
+        """
+        x = np.asarray(x, dtype=np.float64)
+        index = np.floor(x)
+        low = self.sample(index)
+        return low + (x - index) * (self.sample(index + 1) - low)
+
+    def max_slope(self):
+        """
+        Method to return a bound on the gradient of the terrain (change in height per unit x)
+        The derivative of the noise within a lattice cell is at most sup(|A(d)| + |B(d)|) for gradients in [-1, 1], where
+        A and B are the derivatives of the two lattice points' contributions, which is found numerically
+        :return slope:
+        """
+        d = np.linspace(0, 1, 10001)
+        a = _fade(1 - d) - d * _fade_derivative(1 - d)
+        b = _fade(d) + (d - 1) * _fade_derivative(d)
+        bound = float((np.abs(a) + np.abs(b)).max()) * 1.01
+        return abs(self.amplitude) * self.spacing * self.octaves * bound
+
+    def height_bounds(self):
+        """
+        Method to return the lowest and highest heights the terrain can reach
+        1D Perlin noise with gradients in [-1, 1] is bounded by +-0.5
+        :return bounds:
+        """
+        return self.base - 0.5 * abs(self.amplitude), self.base + 0.5 * abs(self.amplitude)
+
+
+def _fade(t):
+    """
+    Perlin smoothstep curve used to weight the contribution of each lattice point
+    """
+    return 6 * t**5 - 15 * t**4 + 10 * t**3
+
+
+def _fade_derivative(t):
+    return 30 * t**4 - 60 * t**3 + 30 * t**2
+
+
+class HeightMapCache:
+    """
+    Class to store generated height maps on disk and memory-map them back in on later runs
+
+    Maps are stored as .npy files keyed by the noise parameters and the range of samples they cover. A cached map is
+    opened read-only, so it loads without being regenerated and every process using the same seed shares its pages.
+    The cache is kept under max_bytes by deleting the least recently used maps once storing new ones takes it over.
+    """
+
+    def __init__(self, directory=None, max_bytes: int = 64 * 2**20, temp_age=3600):
+        """
+        :param directory: directory the maps are stored in, DEFAULT_CACHE_DIR if not given
+        :param max_bytes: total size of the maps kept in the cache
+        :param temp_age: seconds after which a partly written map left by an interrupted process is deleted
+        """
+        self.directory = DEFAULT_CACHE_DIR if directory is None else directory
+        self.max_bytes = max_bytes
+        # Running total of the bytes of maps in the cache, counted when the first map is stored
+        self._size = None
+        self.remove_stale(temp_age)
+
+    def remove_stale(self, temp_age=3600):
+        """
+        Method to delete the temporary files of maps whose writing was interrupted. Files younger than temp_age seconds
+        may still be being written by another process, so they are left alone.
+        """
+        cutoff = time.time() - temp_age
+        for entry in self._entries():
+            if entry.name.endswith(".npy.tmp") and entry.stat().st_mtime < cutoff:
+                _remove(entry.path)
+
+    def prune(self):
+        """
+        Method to delete the least recently used maps until the cache is no larger than max_bytes
+        """
+        maps = [(entry.stat(), entry.path) for entry in self._entries() if entry.name.endswith(".npy")]
+        size = sum(stat.st_size for stat, _ in maps)
+        for stat, path in sorted(maps, key=lambda item: item[0].st_mtime):
+            if size <= self.max_bytes:
+                break
+            _remove(path)
+            size -= stat.st_size
+        self._size = size
+
+    def _entries(self):
+        try:
+            with os.scandir(self.directory) as entries:
+                return [entry for entry in entries if entry.is_file()]
+        except OSError:
+            return []
+
+    def path(self, noise, start, length):
+        """
+        Method to return the file path that the height map for the given noise and sample range is stored at
+        """
+        name = "s{}_o{}_d{}_b{}_a{}_{}+{}.npy".format(noise.seed, noise.octaves, noise.spacing, noise.base,
+                                                     noise.amplitude, start, length)
+        return os.path.join(self.directory, name)
+
+    def open(self, noise, start, length):
+        """
+        Method to memory-map a cached height map
+        :return heights: read-only array of heights, or None if the map is not in the cache
+        """
+        path = self.path(noise, start, length)
+        try:
+            heights = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        if heights.shape != (length,) or heights.dtype != np.float64:
+            return None
+        # The modification time marks when a map was last used, for pruning
+        _touch(path)
+        return heights
+
+    def load(self, noise, start: int = 0, length: int = 0, progress=None, block_size: int = 65536):
+        """
+        Method to return the height map for length samples from start, generating and caching it if it is not already
+        cached. If the cache directory cannot be written to, the map is generated in memory instead.
+
+        :param noise: TerrainNoise used to generate the map
+        :param start: index of the first sample
+        :param length: number of samples
+        :param progress: optional function called with (samples done, length) as the map is generated
+        :param block_size: number of samples generated between progress calls
+        :return heights:
+        """
+        heights = self.open(noise, start, length)
+        if heights is not None:
+            if progress is not None:
+                progress(length, length)
+            return heights
+
+        try:
+            # The finished file is moved into place in one step so other processes never see a partial map
+            with file_store.replacing(self.path(noise, start, length), suffix=".npy.tmp") as temp_path:
+                heights = np.lib.format.open_memmap(temp_path, mode="w+", dtype=np.float64, shape=(length,))
+                _generate(noise, heights, start, progress, block_size)
+                heights.flush()
+                del heights
+        except OSError:
+            return _generate(noise, np.empty(length), start, progress, block_size)
+
+        self._stored(self.path(noise, start, length))
+        return self.open(noise, start, length)
+
+    def _stored(self, path):
+        # The directory is only rescanned for the first map stored and once the running total goes over max_bytes
+        if self._size is not None:
+            try:
+                self._size += os.path.getsize(path)
+            except OSError:
+                pass
+        if self._size is None or self._size > self.max_bytes:
+            self.prune()
+
+
+class ChunkedTerrain:
+    """
+    Class to give access to an unbounded height map, split into fixed-size chunks that are generated on demand
+
+    Sample index i is at world x coordinate i. Only the most recently used chunks are kept in memory, so memory use is
+    bounded however far the lander flies. Because the noise is deterministic per index, a chunk that is evicted and later
+    regenerated is identical and chunk boundaries are seamless.
+    """
+
+    def __init__(self, noise, chunk_size: int = 8192, max_chunks: int = 16, cache=None):
+        """
+        Constructor method for the chunked terrain.
+
+        :param noise: TerrainNoise used to generate the chunks
+        :param chunk_size: number of samples in each chunk
+        :param max_chunks: number of chunks kept in memory before the least recently used one is evicted
+        :param cache: optional HeightMapCache to store and memory-map the chunks
+        """
+        if max_chunks < 2:
+            raise ValueError("max_chunks expected to be at least 2")
+
+        self.noise = noise
+        self.chunk_size = chunk_size
+        self.max_chunks = max_chunks
+        self.cache = cache
+        self.ceiling = noise.height_bounds()[1]
+
+        self._chunks = OrderedDict()
+        self._indexes = {}
+
+        # Chunks may be loaded by a TerrainLoader thread while the game reads them, so the chunk and index tables are
+        # only changed while holding the lock. Chunks are generated outside it.
+        self._lock = threading.Lock()
+
+        # The segment trees over each chunk are stored as flat arrays with the leaves in [tree_size, 2*tree_size)
+        self._tree_size = 1 << (chunk_size - 1).bit_length()
+
+    def chunk(self, chunk_index: int):
+        """
+        Method to return the array of heights for a chunk, generating it if it is not in memory
+        :param chunk_index:
+        :return heights:
+        """
+        with self._lock:
+            heights = self._chunks.get(chunk_index)
+            if heights is not None:
+                self._chunks.move_to_end(chunk_index)
+                return heights
+
+        start = chunk_index * self.chunk_size
+        if self.cache is not None:
+            heights = self.cache.load(self.noise, start, self.chunk_size)
+        else:
+            heights = self.noise.heights(start, self.chunk_size)
+
+        with self._lock:
+            # Another thread may have loaded the same chunk in the meantime
+            existing = self._chunks.get(chunk_index)
+            if existing is not None:
+                self._chunks.move_to_end(chunk_index)
+                return existing
+
+            self._chunks[chunk_index] = heights
+            while len(self._chunks) > self.max_chunks:
+                evicted, _ = self._chunks.popitem(last=False)
+                self._indexes.pop(evicted, None)
+        return heights
+
+    def is_loaded(self, low: float, high: float):
+        """
+        Method to check whether every chunk covering samples low to high is in memory
+        """
+        return self.loaded_count(low, high) == self.chunk_span(low, high)
+
+    def loaded_count(self, low: float, high: float):
+        """
+        Method to return how many of the chunks covering samples low to high are in memory
+        """
+        first_chunk = int(low) // self.chunk_size
+        last_chunk = int(high) // self.chunk_size
+        with self._lock:
+            return sum(1 for i in range(first_chunk, last_chunk + 1) if i in self._chunks)
+
+    def chunk_span(self, low: float, high: float):
+        """
+        Method to return the number of chunks covering samples low to high
+        """
+        return int(high) // self.chunk_size - int(low) // self.chunk_size + 1
+
+    def _index(self, chunk_index: int):
+        """
+        Method to return the query index of a chunk: the slope and unit normal of the segment starting at each sample,
+        and min/max segment trees over its heights. The index is built the first time the chunk is queried and dropped
+        when the chunk is evicted.
+        :param chunk_index:
+        :return slopes, normals_x, normals_y, tree_min, tree_max:
+        """
+        heights = self.chunk(chunk_index)
+        with self._lock:
+            index = self._indexes.get(chunk_index)
+        if index is not None:
+            return index
+
+        # The last segment of the chunk ends at the first sample of the next one
+        next_height = self.noise.heights((chunk_index + 1) * self.chunk_size, 1)
+        slopes = np.diff(heights, append=next_height)
+        lengths = np.sqrt(1 + slopes * slopes)
+
+        # Node i of a tree covers nodes 2i and 2i + 1 below it, with unused leaves padded so they never win a query
+        size = self._tree_size
+        tree_min = np.full(2 * size, np.inf)
+        tree_max = np.full(2 * size, -np.inf)
+        tree_min[size:size + len(heights)] = heights
+        tree_max[size:size + len(heights)] = heights
+        level = size
+        while level > 1:
+            tree_min[level // 2:level] = np.minimum(tree_min[level:2 * level:2], tree_min[level + 1:2 * level:2])
+            tree_max[level // 2:level] = np.maximum(tree_max[level:2 * level:2], tree_max[level + 1:2 * level:2])
+            level //= 2
+
+        index = (slopes, -slopes / lengths, 1 / lengths, tree_min, tree_max)
+        with self._lock:
+            if chunk_index in self._chunks:
+                self._indexes[chunk_index] = index
+        return index
+
+    def heights(self, start: int, n: int):
+        """
+        Method to return the heights of n consecutive samples starting from index start
+        :param start:
+        :param n:
+        :return heights: numpy array of n heights (a view into the chunk when the range does not cross a boundary)
+        """
+        first_chunk, offset = divmod(start, self.chunk_size)
+        if offset + n <= self.chunk_size:
+            return self.chunk(first_chunk)[offset:offset + n]
+
+        last_chunk = (start + n - 1) // self.chunk_size
+        parts = [self.chunk(i) for i in range(first_chunk, last_chunk + 1)]
+        return np.concatenate(parts)[offset:offset + n]
+
+    def height_at(self, index: int):
+        """
+        Method to return the height of the single sample at index
+        """
+        chunk_index, offset = divmod(index, self.chunk_size)
+        return float(self.chunk(chunk_index)[offset])
+
+    def interpolate(self, x: float):
+        """
+        Method to return the height of the ground at world x coordinate x, interpolated linearly between the samples
+        either side
+        """
+        index = math.floor(x)
+        chunk_index, offset = divmod(index, self.chunk_size)
+        slopes = self._index(chunk_index)[0]
+        return float(self.chunk(chunk_index)[offset] + (x - index) * slopes[offset])
+
+    def slope(self, x: float):
+        """
+        Method to return the gradient (change in height per unit x) of the ground at world x coordinate x
+        """
+        chunk_index, offset = divmod(math.floor(x), self.chunk_size)
+        return float(self._index(chunk_index)[0][offset])
+
+    def normal(self, x: float):
+        """
+        Method to return the upward unit normal of the ground at world x coordinate x
+        :return normal: (x, y) components of the normal
+        """
+        chunk_index, offset = divmod(math.floor(x), self.chunk_size)
+        _, normals_x, normals_y, _, _ = self._index(chunk_index)
+        return float(normals_x[offset]), float(normals_y[offset])
+
+    def range_bounds(self, low: int, high: int):
+        """
+        Method to return the lowest and highest sample heights from index low to high (inclusive)
+        Each chunk the range covers is queried through its segment trees, so the cost grows with the logarithm of the
+        length of the range rather than the length itself.
+        :param low:
+        :param high:
+        :return lowest, highest:
+        """
+        lowest = math.inf
+        highest = -math.inf
+        size = self._tree_size
+        for chunk_index in range(low // self.chunk_size, high // self.chunk_size + 1):
+            tree_min, tree_max = self._index(chunk_index)[3:]
+            start = chunk_index * self.chunk_size
+            left = max(low - start, 0) + size
+            right = min(high - start, self.chunk_size - 1) + size + 1
+
+            # Climb the trees from the leaves, taking the nodes that lie wholly inside the range
+            while left < right:
+                if left & 1:
+                    lowest = min(lowest, tree_min[left])
+                    highest = max(highest, tree_max[left])
+                    left += 1
+                if right & 1:
+                    right -= 1
+                    lowest = min(lowest, tree_min[right])
+                    highest = max(highest, tree_max[right])
+                left //= 2
+                right //= 2
+        return float(lowest), float(highest)
+
+    def hull_collides(self, hull):
+        """
+        Method to check whether a convex hull touches or overlaps the ground
+        Hulls above the highest the terrain can reach, or above the highest ground under them (found with range_bounds),
+        are ruled out before the exact test against each sample.
+        :param hull: sequence of (x, y) world coordinates of the hull's corners, in order around the hull
+        :return collided:
+        """
+        corners_x = [point[0] for point in hull]
+        corners_y = [point[1] for point in hull]
+        left = min(corners_x)
+        right = max(corners_x)
+        bottom = min(corners_y)
+        if bottom > self.ceiling or self.range_bounds(math.floor(left), math.ceil(right))[1] < bottom:
+            return False
+
+        hull_x = np.array(corners_x)
+        hull_y = np.array(corners_y)
+        first = math.ceil(left)
+        xs = np.arange(first, math.floor(right) + 1, dtype=np.float64)
+        heights = self.heights(first, len(xs))
+        vertex_heights = np.array([self.interpolate(x) for x in corners_x])
+        return bool(hull_intersects(hull_x, hull_y, xs, heights, vertex_heights))
+
+    def prefetch(self, low: float, high: float, progress=None):
+        """
+        Method to make sure every chunk covering samples low to high is in memory
+        :param low:
+        :param high:
+        :param progress: optional function called with (chunks done, total chunks) after each chunk
+        """
+        first_chunk = int(low) // self.chunk_size
+        last_chunk = int(high) // self.chunk_size
+        total = last_chunk - first_chunk + 1
+        for i in range(first_chunk, last_chunk + 1):
+            self.chunk(i)
+            if progress is not None:
+                progress(i - first_chunk + 1, total)
+
+    def loaded_chunks(self):
+        """
+        Method to return the indices of the chunks currently in memory, from least to most recently used
+        """
+        with self._lock:
+            return list(self._chunks)
+
+
+class TerrainLoader:
+    """
+    Class to generate the chunks of a ChunkedTerrain on a background thread, so the game can keep drawing frames while
+    the terrain it will need next is generated
+
+    Chunks are asked for with request() and generated in the order they were asked for. Anything that needs a chunk
+    before the loader has reached it still gets it from ChunkedTerrain.chunk, which generates it on the spot.
+    """
+
+    def __init__(self, terrain):
+        """
+        :param terrain: ChunkedTerrain to load chunks into
+        """
+        self.terrain = terrain
+        self._queue = queue.Queue()
+        self._queued = set()
+        self._watchers = []
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="terrain-loader", daemon=True)
+        self._thread.start()
+
+    def request(self, low: float, high: float, progress=None):
+        """
+        Method to queue every chunk covering samples low to high that is not already loaded or queued
+        :param low:
+        :param high:
+        :param progress: optional function called with (chunks loaded, total chunks) for the range, from the loader's
+                         thread, after each chunk is loaded until the range is complete
+        """
+        first_chunk = int(low) // self.terrain.chunk_size
+        last_chunk = int(high) // self.terrain.chunk_size
+        loaded = set(self.terrain.loaded_chunks())
+
+        with self._lock:
+            for i in range(first_chunk, last_chunk + 1):
+                if i not in loaded and i not in self._queued:
+                    self._queued.add(i)
+                    self._queue.put(i)
+            if progress is not None:
+                self._watchers.append((low, high, progress))
+
+        if progress is not None:
+            self._report()
+
+    def ready(self, low: float, high: float):
+        """
+        Method to check whether every chunk covering samples low to high has been loaded
+        """
+        return self.terrain.is_loaded(low, high)
+
+    def progress(self, low: float, high: float):
+        """
+        Method to return how much of the range low to high has been loaded
+        :return loaded, total: number of chunks loaded and the number covering the range
+        """
+        return self.terrain.loaded_count(low, high), self.terrain.chunk_span(low, high)
+
+    @property
+    def busy(self):
+        """
+        Whether there are chunks waiting to be loaded
+        """
+        with self._lock:
+            return bool(self._queued)
+
+    def close(self):
+        """
+        Method to stop the loader's thread once it has finished the chunk it is loading
+        """
+        with self._lock:
+            self._queued.clear()
+            self._watchers.clear()
+            while not self._queue.empty():
+                self._queue.get_nowait()
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            chunk_index = self._queue.get()
+            if chunk_index is None:
+                return
+            self.terrain.chunk(chunk_index)
+            with self._lock:
+                self._queued.discard(chunk_index)
+            self._report()
+
+    def _report(self):
+        """
+        Method to call the progress functions of the ranges being watched, dropping those that are complete (or can no
+        longer complete because nothing more is queued)
+        """
+        with self._lock:
+            watchers = list(self._watchers)
+            idle = not self._queued
+
+        finished = []
+        for watcher in watchers:
+            low, high, progress = watcher
+            loaded, total = self.progress(low, high)
+            progress(loaded, total)
+            if loaded == total or idle:
+                finished.append(watcher)
+
+        if finished:
+            with self._lock:
+                self._watchers = [watcher for watcher in self._watchers if watcher not in finished]
+
+
+def lower_hull(hull_x, hull_y, xs):
+    """
+    Function to return the height of the bottom edge of a convex hull at each x coordinate in xs
+    Works on a single hull, or a stack of hulls with one row of xs per hull.
+    :param hull_x: x coordinates of the hull's corners in order around it, shape (..., corners)
+    :param hull_y: y coordinates of the hull's corners
+    :param xs: x coordinates to evaluate, shape (..., k)
+    :return heights: heights of the bottom edge, inf where xs is outside the hull, shape (..., k)
+    """
+    x0 = hull_x[..., :, None]
+    y0 = hull_y[..., :, None]
+    x1 = np.roll(hull_x, -1, axis=-1)[..., :, None]
+    y1 = np.roll(hull_y, -1, axis=-1)[..., :, None]
+    xs = np.asarray(xs)[..., None, :]
+
+    # Height of every edge at every x, skipping vertical edges (their ends are covered by the neighbouring edges)
+    dx = x1 - x0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        edge_heights = y0 + (xs - x0) / dx * (y1 - y0)
+    spans = (xs >= np.minimum(x0, x1)) & (xs <= np.maximum(x0, x1)) & (dx != 0)
+    return np.where(spans, edge_heights, np.inf).min(axis=-2)
+
+
+def hull_intersects(hull_x, hull_y, xs, heights, vertex_heights, valid=None):
+    """
+    Function to check whether convex hulls touch or overlap a piecewise linear ground
+
+    Between the samples and the hull's corners both the ground and the bottom of the hull are straight, so they meet if
+    and only if a corner is on or below the ground or a ground sample under the hull is on or above the hull's bottom
+    edge.
+
+    :param hull_x: x coordinates of the hull's corners in order around it, shape (..., corners)
+    :param hull_y: y coordinates of the hull's corners
+    :param xs: x coordinates of the ground samples under the hull, shape (..., k)
+    :param heights: heights of the ground samples
+    :param vertex_heights: height of the ground under each corner
+    :param valid: optional mask of the entries of xs that are real samples, for hulls padded to the same k
+    :return collided: bool, or array of bools with shape (...)
+    """
+    above = heights >= lower_hull(hull_x, hull_y, xs)
+    if valid is not None:
+        above &= valid
+    return (vertex_heights >= hull_y).any(axis=-1) | above.any(axis=-1)
+
+
+def _generate(noise, heights, start, progress, block_size):
+    """
+    Function to fill heights with the terrain from start onwards in blocks, reporting progress after each block
+    """
+    for block_start in range(0, len(heights), block_size):
+        block_end = min(block_start + block_size, len(heights))
+        heights[block_start:block_end] = noise.heights(start + block_start, block_end - block_start)
+        if progress is not None:
+            progress(block_end, len(heights))
+    return heights
+
+
+def _remove(path):
+    # Another process may have removed or replaced the file first
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _touch(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
@@ -0,0 +1,54 @@
+"""
+Cache of rendered text surfaces
+Rendering text with a font is slow, and most of the text on screen is the same from one frame to the next, so rendered
+surfaces are kept in a bounded least recently used cache
+"""
+from collections import OrderedDict
+
+
+class TextCache:
+    """
+    Class to render text through pygame fonts, reusing the surface from the last time the same text was rendered
+    """
+
+    def __init__(self, max_size: int = 256):
+        """
+        :param max_size: number of rendered surfaces kept before the least recently used one is dropped
+        """
+        self.max_size = max_size
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, colour, antialias=True):
+        """
+        Method to return text rendered with font, in the same way as font.render(text, antialias, colour)
+        :param font: pygame font to render with
+        :param text:
+        :param colour: colour as an RGB tuple
+        :param antialias:
+        :return surface:
+        """
+        key = (font, text, tuple(colour), antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self._surfaces.move_to_end(key)
+            return surface
+
+        surface = font.render(text, antialias, colour)
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+def format_value(value, precision: int = 0):
+    """
+    Function to format a value to the precision it is displayed at, so that values which look the same on screen give
+    the same string (and -0.0 is shown as 0.0)
+    """
+    value = round(value, precision) + 0
+    if precision == 0:
+        return str(int(value))
+    return "{:.{}f}".format(value, precision)
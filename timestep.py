@@ -0,0 +1,51 @@
+"""
+Fixed timestep scheduling for the game's physics
+Collects the real time that passes between frames and hands it out as whole physics steps of a fixed length, so the
+simulation is the same however fast or unevenly frames are drawn. The time left over is how far the display is between
+the last two physics states, which drawing interpolates across.
+"""
+
+
+class FixedTimestep:
+    """
+    Class to turn frame times into a number of fixed length physics steps to run each frame
+    """
+
+    def __init__(self, rate=240, max_substeps: int = 16):
+        """
+        :param rate: physics steps per second
+        :param max_substeps: most physics steps run in one frame. Time beyond that is dropped, slowing the game down
+                             after a long hitch rather than taking ever longer frames to catch up
+        """
+        self.rate = rate
+        self.step_time = 1000 / rate
+        self.max_substeps = max_substeps
+        self.reset()
+
+    def reset(self):
+        """
+        Method to forget any time accumulated, ready for a new flight
+        """
+        self.accumulator = 0.0
+        self.dropped_time = 0.0
+
+    def advance(self, frame_time):
+        """
+        Method to add the time taken by the last frame
+        :param frame_time: real time since the last frame, in milliseconds
+        :return steps: number of physics steps to run this frame
+        """
+        self.accumulator += frame_time
+        steps = int(self.accumulator // self.step_time)
+        self.accumulator -= steps * self.step_time
+        if steps > self.max_substeps:
+            self.dropped_time += (steps - self.max_substeps) * self.step_time
+            steps = self.max_substeps
+        return steps
+
+    @property
+    def alpha(self):
+        """
+        Fraction of a physics step accumulated but not yet run, used to interpolate between the last two physics states
+        """
+        return self.accumulator / self.step_time
@@ -216,3 +216,148 @@ class vector:
             unit = self
 
         return unit
+
+
+#========== 2D Vector Class Definition ==========
+class vector2:
+    """
+    Lightweight 2D vector for the physics hot path.
+    Uses __slots__ and only stores x and y, with the magnitude and unit vector calculated when they are asked for rather
+    than on every construction. Supports the same operations as vector, plus in-place +=, -=, *= and /=.
+
+    The magnitude is cached once calculated; like vector, assigning to x or y directly does not update it, so change a
+    vector2 with the in-place operators instead.
+    """
+    __slots__ = ("x", "y", "_mag")
+
+    #Class level attributes so that vector2 can be used anywhere a 2D vector is expected
+    dimension = 2
+    z = None
+
+    def __init__(self, x=0, y=0):
+        self.x = x
+        self.y = y
+        self._mag = None
+
+    def __str__(self):
+        return "({},{})".format(self.x,self.y)
+
+    def __repr__(self):
+        return "vector2({},{})".format(self.x,self.y)
+
+    def __abs__(self):
+        return self.mag
+
+    def __eq__(self, other):
+        try:
+            return self.x == other.x and self.y == other.y and other.z is None
+        except AttributeError:
+            return False
+
+    def __add__(self, other):
+        return vector2(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other):
+        return vector2(self.x - other.x, self.y - other.y)
+
+    def __neg__(self):
+        return vector2(-self.x, -self.y)
+
+    def __mul__(self, other):
+        """
+        Method to multiply a vector by a scalar, or return the cross product with another vector.
+        Scalars are checked for first using their exact type, as they are by far the most common case.
+        """
+        if type(other) in _SCALAR_TYPES:
+            return vector2(self.x * other, self.y * other)
+        if hasattr(other, "x"):
+            return self.cross(other)
+        return vector2(self.x * other, self.y * other)
+
+    def __rmul__(self, other):
+        return vector2(self.x * other, self.y * other)
+
+    def __truediv__(self, other):
+        return vector2(self.x / other, self.y / other)
+
+    def __iadd__(self, other):
+        self.x += other.x
+        self.y += other.y
+        self._mag = None
+        return self
+
+    def __isub__(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        self._mag = None
+        return self
+
+    def __imul__(self, other):
+        """
+        Method to scale the vector in place. Only scalars are supported, as a cross product is not a 2D vector.
+        """
+        self.x *= other
+        self.y *= other
+        self._mag = None
+        return self
+
+    def __itruediv__(self, other):
+        self.x /= other
+        self.y /= other
+        self._mag = None
+        return self
+
+    def __getitem__(self, num):
+        if num == 0:
+            return self.x
+        elif num == 1:
+            return self.y
+        raise IndexError("Index out of Bounds")
+
+    def dot(self, other):
+        return self.x*other.x + self.y*other.y
+
+    def cross(self, other):
+        """
+        Method to return the cross product with the vector passed in as other (as a 3D vector)
+        """
+        if other.z is None:
+            return vector(0, 0, self.x*other.y - self.y*other.x)
+        return vector(self.y*other.z, -self.x*other.z, self.x*other.y - self.y*other.x)
+
+    def angle(self, other=None):
+        """
+        Method to return the angle between this vector and another passed in as other.
+
+        If no other vector is passed in, it defaults to the angle between the vector and the x axis
+        """
+        if other is None:
+            other = vector2(1, 0)
+
+        return math.acos(self.dot(other) / (self.mag * other.mag))
+
+    def magnitude(self):
+        return math.hypot(self.x, self.y)
+
+    @property
+    def mag(self):
+        mag = self._mag
+        if mag is None:
+            mag = self._mag = math.hypot(self.x, self.y)
+        return mag
+
+    @property
+    def unit(self):
+        """
+        A unit vector in the direction of this vector (or the vector itself if it has magnitude 0 or 1)
+        """
+        mag = self.mag
+        if mag != 0 and mag != 1:
+            return vector2(self.x / mag, self.y / mag)
+        return self
+
+    def copy(self):
+        return vector2(self.x, self.y)
+
+
+_SCALAR_TYPES = frozenset((int, float))